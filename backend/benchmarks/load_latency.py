@@ -0,0 +1,56 @@
+"""Concurrent load benchmark for the ProjectHub API.
+
+Fires ``--requests`` GET requests at ``--path`` from ``--concurrency`` workers
+against a running server and reports throughput and latency percentiles.
+Run it once against a build on the blocking Session path and once against the
+AsyncSession path to compare p99 under load:
+
+    python benchmarks/load_latency.py --token <jwt> --path /api/tasks/my
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run(base_url: str, path: str, token: str, concurrency: int, total: int):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    session = requests.Session()
+    latencies, errors = [], 0
+
+    def hit(_):
+        start = time.perf_counter()
+        response = session.get(base_url + path, headers=headers)
+        return time.perf_counter() - start, response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for elapsed, status_code in pool.map(hit, range(total)):
+            latencies.append(elapsed * 1000)
+            if status_code >= 400:
+                errors += 1
+    wall = time.perf_counter() - started
+
+    print(f"{path}: {total} requests, concurrency {concurrency}, {errors} errors")
+    print(f"  throughput: {total / wall:.1f} req/s")
+    print(f"  p50: {percentile(latencies, 50):.1f} ms  p95: {percentile(latencies, 95):.1f} ms  "
+          f"p99: {percentile(latencies, 99):.1f} ms  max: {max(latencies):.1f} ms  mean: {statistics.mean(latencies):.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/api/tasks/my")
+    parser.add_argument("--token", default="")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.base_url, args.path, args.token, args.concurrency, args.requests)
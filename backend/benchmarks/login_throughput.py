@@ -0,0 +1,79 @@
+"""Login password-check throughput and event-loop stall benchmark.
+
+Runs --logins concurrent password checks, the CPU-bound part of /api/auth/login,
+in-process at --rounds bcrypt cost. Two modes are compared: calling passlib
+directly on the event loop, as login_user used to, and services.passwords,
+which runs the check on the bounded hashing executor. A ticker coroutine
+measures how late the loop wakes it up while the logins run. That lateness
+is what every other request on the worker waits through.
+
+    python benchmarks/login_throughput.py --logins 64 --rounds 12
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/projecthub")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-of-a-sensible-length")
+
+TICK = 0.005
+
+
+async def inline_check(pwd_context, password, hashed):
+    return pwd_context.verify_and_update(password, hashed)
+
+
+async def ticker(lags: list, stop: asyncio.Event):
+    while not stop.is_set():
+        expected = time.perf_counter() + TICK
+        await asyncio.sleep(TICK)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def measure(check, logins: int, password: str, hashed: str) -> dict:
+    lags, stop = [], asyncio.Event()
+    tick_task = asyncio.create_task(ticker(lags, stop))
+    await asyncio.sleep(TICK * 2)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(check(password, hashed) for _ in range(logins)))
+    wall = time.perf_counter() - started
+    stop.set()
+    await tick_task
+    assert all(valid for valid, _ in results)
+    lags.sort()
+    return {
+        "per_second": logins / wall,
+        "max_lag_ms": (lags[-1] if lags else wall) * 1000,
+        "p99_lag_ms": (lags[int(len(lags) * 0.99) - 1] if len(lags) > 1 else wall) * 1000,
+        "ticks": len(lags),
+    }
+
+
+async def main(args):
+    from services import passwords
+
+    password = "correct horse battery staple"
+    hashed = passwords.pwd_context.hash(password)
+    print(f"bcrypt rounds {args.rounds}, {args.logins} concurrent logins, {passwords.settings.PASSWORD_HASH_WORKERS} hashing threads")
+    print(f"{'mode':<26}{'logins/s':>10}{'max loop lag':>15}{'p99 loop lag':>15}{'ticks':>7}")
+    for name, check in (
+        ("inline on the event loop", lambda p, h: inline_check(passwords.pwd_context, p, h)),
+        ("hashing executor", passwords.verify_password),
+    ):
+        result = await measure(check, args.logins, password, hashed)
+        print(f"{name:<26}{result['per_second']:>10.1f}{result['max_lag_ms']:>13.1f}ms{result['p99_lag_ms']:>13.1f}ms{result['ticks']:>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=None, help="override PASSWORD_HASH_WORKERS")
+    args = parser.parse_args()
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    if args.workers:
+        os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+    asyncio.run(main(args))
@@ -0,0 +1,127 @@
+"""Query-plan check for the hot listing endpoints.
+
+Runs EXPLAIN for the queries behind the task, notification and project listings
+against the configured DATABASE_URL and exits non-zero if one does not use the
+indexes expected for it. The statements come from the same query builders the
+controllers call (task_controller.project_tasks_query and friends), so the
+check covers the SQL the app actually runs: keyset ordering on
+(created_at, id), the assignee-only listing for members without
+VIEW_ALL_TASKS, and the unread counter's primary key lookup. On PostgreSQL
+sequential scans are disabled for the session, so the check holds on small or
+empty development databases too. Run after `alembic upgrade head`:
+
+    python benchmarks/query_plans.py
+
+or, with no database at hand (e.g. in CI), against a throwaway SQLite file
+built the way a deployment is: create_all as server.py does, then every
+migration:
+
+    python benchmarks/query_plans.py --sqlite
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-of-a-sensible-length")
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--sqlite", action="store_true", help="check a fresh, migrated SQLite database instead of DATABASE_URL")
+args = parser.parse_args()
+if args.sqlite:
+    # Must be set before config is imported
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'query_plans.db')}"
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import ARRAY, text
+
+from controllers import project_controller, task_controller
+from models import schemas
+from models.database import engine
+from services import notification_service
+from services.pagination import encode_cursor
+
+SAMPLE_ID = "00000000-0000-0000-0000-000000000000"
+SAMPLE_CURSOR = encode_cursor([datetime(2026, 1, 1), SAMPLE_ID])
+
+def primary_key(table: str) -> str:
+    """Primary key index name on PostgreSQL or SQLite, whichever is connected."""
+    return f"{table}_pkey" if engine.dialect.name == "postgresql" else f"sqlite_autoindex_{table}_1"
+
+def first_page(query):
+    return task_controller.task_page(query, None, 1, 20)
+
+def cursor_page(query):
+    return task_controller.task_page(query, SAMPLE_CURSOR, 1, 20)
+
+# (endpoint, statement, groups): every group needs at least one of its indexes in the plan
+CHECKS = [
+    ("get_project_tasks", first_page(task_controller.project_tasks_query(SAMPLE_ID)),
+     [("ix_tasks_project_id_created_at",)]),
+    ("get_project_tasks?cursor", cursor_page(task_controller.project_tasks_query(SAMPLE_ID)),
+     [("ix_tasks_project_id_created_at",)]),
+    ("get_project_tasks?status", first_page(task_controller.project_tasks_query(SAMPLE_ID, "todo")),
+     [("ix_tasks_project_id_status_created_at",)]),
+    # Members without VIEW_ALL_TASKS: either side of the assignee semi-join may drive
+    ("get_project_tasks (assigned only)", first_page(task_controller.project_tasks_query(SAMPLE_ID, assignee_id=SAMPLE_ID)),
+     [("ix_tasks_project_id_created_at", "ix_task_assignees_user_id"), ("ix_task_assignees_user_id", primary_key("task_assignees"))]),
+    ("get_user_tasks", first_page(task_controller.user_tasks_query(SAMPLE_ID)),
+     [("ix_task_assignees_user_id", primary_key("task_assignees"))]),
+    ("get_personal_tasks", first_page(task_controller.personal_tasks_query(SAMPLE_ID)),
+     [("ix_tasks_owner_id_created_at",)]),
+    ("get_personal_tasks?status", first_page(task_controller.personal_tasks_query(SAMPLE_ID, "todo")),
+     [("ix_tasks_owner_id_status_created_at",)]),
+    ("get_pending_approval_tasks", first_page(task_controller.pending_approval_query(SAMPLE_ID)),
+     [("ix_tasks_project_id_status_created_at",)]),
+    ("get_user_notifications", notification_service.user_notifications_query(SAMPLE_ID, False),
+     [("ix_notifications_user_id_created_at",)]),
+    ("get_user_notifications?unread_only", notification_service.user_notifications_query(SAMPLE_ID, True),
+     [("ix_notifications_user_id_is_read_created_at",)]),
+    ("get_unread_count", notification_service.unread_count_query(SAMPLE_ID),
+     [(primary_key("users"),)]),
+    ("get_personal_projects", project_controller.project_page(project_controller.personal_projects_query(SAMPLE_ID), None, 1, 20),
+     [("ix_projects_owner_id_created_at",)]),
+    ("get_projects_for_team", project_controller.team_projects_query(SAMPLE_ID),
+     [("ix_projects_team_id",)]),
+]
+
+def build_sqlite_database():
+    # roles.permissions is an ARRAY, which SQLite cannot create; no checked query touches roles
+    tables = [table for table in schemas.Base.metadata.sorted_tables
+              if not any(isinstance(column.type, ARRAY) for column in table.columns)]
+    schemas.Base.metadata.create_all(engine, tables=tables)
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    command.upgrade(config, "head")
+
+def explain(connection, query) -> str:
+    compiled = query.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True})
+    if connection.dialect.name == "postgresql":
+        rows = connection.execute(text(f"EXPLAIN {compiled}")).all()
+    else:
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return "\n".join(" ".join(str(col) for col in row) for row in rows)
+
+def main() -> int:
+    if args.sqlite:
+        build_sqlite_database()
+    failures = 0
+    with engine.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SET enable_seqscan = off"))
+        for name, query, groups in CHECKS:
+            plan = explain(connection, query)
+            ok = all(any(index in plan for index in group) for group in groups)
+            failures += not ok
+            expected = " and ".join(group[0] if len(group) == 1 else f"({' or '.join(group)})" for group in groups)
+            print(f"[{'ok' if ok else 'FAIL'}] {name}: expected {expected}")
+            if not ok:
+                print("    " + plan.replace("\n", "\n    "))
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
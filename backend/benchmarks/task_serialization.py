@@ -0,0 +1,103 @@
+"""Serialization cost of a task list page: with submissions, full summary, and a sparse fieldset.
+
+Builds --tasks in-memory Task objects, each with --assignees assignees, a
+project and --submissions submissions. Each page is then serialized three
+ways:
+
+- "submissions": every task as a TaskResponse, submissions included. This is
+  what the list routes shipped while submissions lived in a JSON column on tasks.
+- "full": PaginatedTaskSummaryResponse validated from the ORM objects. This is
+  what the list routes return without fields=.
+- "lean": the prebuilt model for a field set validated from the column rows
+  that lean_task_query returns.
+
+Reports time per page and payload size. No database is needed:
+
+    python benchmarks/task_serialization.py --tasks 100 --submissions 5 --fields board
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/projecthub")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-of-a-sensible-length")
+
+from models import schemas
+from services.task_fields import TASK_COLUMNS, parse_fields, task_page_model
+
+
+def build_tasks(args):
+    now = datetime.now(timezone.utc)
+    owner = str(uuid.uuid4())
+    project = schemas.Project(id=str(uuid.uuid4()), name="Benchmark project", description="Seeded for the benchmark",
+                              owner_id=owner, created_at=now, updated_at=now)
+    users = [schemas.User(id=str(uuid.uuid4()), username=f"user{i}", email=f"user{i}@example.com", full_name=f"User {i}")
+             for i in range(args.assignees)]
+    tasks = []
+    for i in range(args.tasks):
+        task = schemas.Task(
+            id=str(uuid.uuid4()), title=f"Task {i}", description="A task description of ordinary length " * 3, notes="",
+            project_id=project.id, owner_id=owner, assigned_by=owner, status="in_progress", priority="medium",
+            created_at=now, assigned_at=now, deadline=now, project=project, assignees=users,
+        )
+        task.submissions = [
+            schemas.TaskSubmission(task_id=task.id, user_id=str(uuid.uuid4()), username="User", content="x" * args.submission_size, timestamp=now)
+            for _ in range(args.submissions)
+        ]
+        tasks.append(task)
+    return tasks
+
+
+def time_it(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), len(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=100, help="tasks per page")
+    parser.add_argument("--assignees", type=int, default=3)
+    parser.add_argument("--submissions", type=int, default=5, help="submissions per task")
+    parser.add_argument("--submission-size", type=int, default=500, help="characters per submission")
+    parser.add_argument("--fields", default="board", help="a preset name or a comma-separated field list")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    tasks = build_tasks(args)
+    fields = parse_fields(args.fields)
+    # What lean_task_rows hands the model: a dict holding just the selected columns
+    rows = [{name: getattr(task, name) for name in fields if name in TASK_COLUMNS} for task in tasks]
+    if "assignee_ids" in fields:
+        for row, task in zip(rows, tasks):
+            row["assignee_ids"] = task.assignee_ids
+    if "project" in fields:
+        for row, task in zip(rows, tasks):
+            row["project"] = task.project
+    page_model = task_page_model(fields)
+
+    with_submissions = lambda: "[" + ",".join(schemas.TaskResponse.model_validate(task).model_dump_json() for task in tasks) + "]"
+    full = lambda: schemas.PaginatedTaskSummaryResponse(tasks=tasks, total_count=len(tasks)).model_dump_json()
+    lean = lambda: page_model(tasks=rows, total_count=len(tasks)).model_dump_json()
+
+    print(f"{args.tasks} tasks/page, {args.submissions} submissions of {args.submission_size} chars, fields={','.join(sorted(fields))}")
+    print(f"{'payload':<14}{'per page':>12}{'bytes':>12}")
+    results = {}
+    for name, fn in (("submissions", with_submissions), ("full", full), ("lean", lean)):
+        results[name] = time_it(fn, args.repeat)
+        seconds, size = results[name]
+        print(f"{name:<14}{seconds * 1000:>10.2f}ms{size:>12}")
+    for name in ("full", "lean"):
+        print(f"{name} is {results['submissions'][0] / results[name][0]:.1f}x faster and {results['submissions'][1] / results[name][1]:.1f}x smaller than with submissions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Team membership check and member listing at org scale.
+
+Seeds one team with --members users into DATABASE_URL, then times the old and
+new versions of the hot team paths. The old versions load team.members and
+work on the Python list; the new ones ask team_members with an EXISTS (through
+services.permissions.require_team, with its cache disabled) and page in SQL. The paths are the access check behind get_team_by_id and
+get_projects_for_team, and get_team_members for the first page and a deep
+cursor page. The seeded rows are deleted again afterwards, so point it at a
+scratch database:
+
+    python benchmarks/team_membership.py --members 10000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/projecthub")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-of-a-sensible-length")
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import selectinload
+
+from controllers import team_controller
+from models import schemas
+from models.database import AsyncSessionLocal, Base, async_engine, engine
+from services.permissions import Permission, permission_resolver, require_team
+
+# The resolver reads role permissions for non-owners, so the roles table has to exist
+TABLES = [schemas.User.__table__, schemas.Team.__table__, schemas.team_member_association, schemas.Role.__table__]
+
+def seed(members: int):
+    run = uuid.uuid4().hex[:8]
+    users = [{"id": f"bench-{run}-{i:06d}", "username": f"bench_{run}_{i}", "email": f"bench_{run}_{i}@example.com",
+              "full_name": f"Bench User {i}", "hashed_password": "x", "unread_notification_count": 0} for i in range(members)]
+    team_id = f"bench-{run}-team"
+    with engine.begin() as connection:
+        Base.metadata.create_all(connection, tables=TABLES)
+        connection.execute(insert(schemas.User.__table__), users)
+        connection.execute(insert(schemas.Team.__table__).values(id=team_id, name=f"bench {run}", description="", owner_id=users[0]["id"]))
+        connection.execute(insert(schemas.team_member_association), [{"team_id": team_id, "user_id": user["id"]} for user in users])
+    return run, team_id, users
+
+def cleanup(run: str, team_id: str):
+    with engine.begin() as connection:
+        connection.execute(delete(schemas.team_member_association).where(schemas.team_member_association.c.team_id == team_id))
+        connection.execute(delete(schemas.Team.__table__).where(schemas.Team.id == team_id))
+        connection.execute(delete(schemas.User.__table__).where(schemas.User.id.like(f"bench-{run}-%")))
+
+async def legacy_access_check(team_id: str, user: schemas.User, db):
+    result = await db.execute(select(schemas.Team).options(selectinload(schemas.Team.members)).filter(schemas.Team.id == team_id))
+    team = result.scalars().first()
+    member_ids = [member.id for member in team.members]
+    assert user.id in member_ids or team.owner_id == user.id
+    return team
+
+async def legacy_team_members(team_id: str, user: schemas.User, db, page: int, per_page: int):
+    team = await legacy_access_check(team_id, user, db)
+    start = (page - 1) * per_page
+    return team.members[start:start + per_page]
+
+async def timed(label: str, make_call, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            await make_call(db)
+            samples.append(time.perf_counter() - started)
+    print(f"{label:<44}{statistics.median(samples) * 1000:>10.1f}ms{max(samples) * 1000:>10.1f}ms")
+
+async def main(args):
+    run, team_id, users = seed(args.members)
+    # Time the access query on every run rather than the resolver's cross-request cache
+    permission_resolver.ttl = 0
+    try:
+        # A member near the end of the list, the worst case for a linear membership scan
+        caller = schemas.User(id=users[-1]["id"])
+        async with AsyncSessionLocal() as db:
+            deep = await team_controller.get_team_members(team_id, caller, db, page=1, per_page=args.members // 2, with_total=False)
+        deep_cursor = deep.next_cursor
+        deep_page = args.members // 2 // args.per_page + 1
+
+        print(f"{args.members} members, {args.per_page} per page, median and max of {args.repeat} runs")
+        print(f"{'path':<44}{'median':>12}{'max':>12}")
+        await timed("access check: load members", lambda db: legacy_access_check(team_id, caller, db), args.repeat)
+        await timed("access check: EXISTS", lambda db: require_team(db, caller, team_id, Permission.READ, team_controller.TEAM_ACCESS_DENIED), args.repeat)
+        await timed("members page 1: load and slice", lambda db: legacy_team_members(team_id, caller, db, 1, args.per_page), args.repeat)
+        await timed("members page 1: SQL page + count", lambda db: team_controller.get_team_members(team_id, caller, db, 1, args.per_page), args.repeat)
+        await timed(f"members page {deep_page}: load and slice", lambda db: legacy_team_members(team_id, caller, db, deep_page, args.per_page), args.repeat)
+        await timed(f"members page {deep_page}: SQL cursor, no count", lambda db: team_controller.get_team_members(team_id, caller, db, cursor=deep_cursor, per_page=args.per_page, with_total=False), args.repeat)
+    finally:
+        await async_engine.dispose()
+        cleanup(run, team_id)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=10000)
+    parser.add_argument("--per-page", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,102 @@
+"""Requests/sec microbenchmark for TokenRefreshMiddleware.
+
+Drives a minimal app in-process through raw ASGI calls (no network, no
+database) with one authenticated route, and compares: no middleware, the
+previous BaseHTTPMiddleware implementation that re-signed a token on every
+response, and the current ASGI sliding-refresh middleware with a fresh token
+and with a token past the refresh threshold.
+
+    python benchmarks/token_refresh_middleware.py --requests 20000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/projecthub")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-of-a-sensible-length")
+
+import jwt
+from fastapi import Depends, FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from config import settings
+from middleware.auth import create_access_token, get_current_payload
+from middleware.token_refresh import TokenRefreshMiddleware
+
+
+class LegacyTokenRefreshMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        if 200 <= response.status_code < 300 and request.url.path.startswith("/api/"):
+            auth_header = request.headers.get("authorization")
+            if auth_header:
+                scheme, token = auth_header.split()
+                payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.ALGORITHM])
+                response.headers["X-New-Token"] = create_access_token(data={"sub": payload["sub"]})
+        return response
+
+
+def build_app(middleware=None):
+    app = FastAPI()
+
+    @app.get("/api/ping")
+    async def ping(payload: dict = Depends(get_current_payload)):
+        return {"sub": payload["sub"]}
+
+    if middleware:
+        app.add_middleware(middleware)
+    return app
+
+
+async def measure(app, token: str, total: int) -> float:
+    headers = [(b"authorization", f"Bearer {token}".encode())]
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(total):
+        request_sent = False
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # Like a real server: nothing more arrives until the client goes away
+            await asyncio.Event().wait()
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": "/api/ping", "raw_path": b"/api/ping", "root_path": "",
+            "query_string": b"", "headers": headers, "client": ("127.0.0.1", 1), "server": ("test", 80),
+        }
+        await app(scope, receive, send)
+    return total / (time.perf_counter() - started)
+
+
+async def main(total: int):
+    fresh_token = create_access_token(data={"sub": "bench-user"})
+    lifetime = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    aged_token = create_access_token(data={"sub": "bench-user"}, expires_delta=lifetime * (1 - settings.TOKEN_REFRESH_THRESHOLD) * 0.5)
+
+    cases = [
+        ("no middleware", build_app(), fresh_token),
+        ("legacy BaseHTTPMiddleware", build_app(LegacyTokenRefreshMiddleware), fresh_token),
+        ("ASGI sliding refresh, fresh token", build_app(TokenRefreshMiddleware), fresh_token),
+        ("ASGI sliding refresh, aged token", build_app(TokenRefreshMiddleware), aged_token),
+    ]
+    for name, app, token in cases:
+        await measure(app, token, min(total, 500))  # warm-up
+        print(f"{name:<36} {await measure(app, token, total):>10.0f} req/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,125 @@
+"""Fan-out benchmark for ConnectionManager.broadcast.
+
+Connects simulated sockets to one project channel in-process (no network) and
+broadcasts a message to all of them. Every socket takes --latency seconds per
+send, and --slow of them take --slow-latency seconds, which is how a congested
+client looks from the server. Compares the previous manager, which awaited each
+send in turn and logged three INFO lines per connection, with the current
+queue-per-connection manager. Reports how long the broadcast call blocked the
+caller, how long until every fast socket had the message, and how many slow
+sockets were evicted.
+
+    python benchmarks/websocket_broadcast.py --sockets 5000 --slow 5
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/projecthub")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-of-a-sensible-length")
+
+from services.pubsub import InMemoryPubSub
+from websocket_manager import ConnectionManager
+
+PROJECT_ID = "benchmark-project"
+
+
+class SimulatedSocket:
+    def __init__(self, latency: float, delivered: asyncio.Event = None, pending: list = None):
+        self.latency = latency
+        self.delivered = delivered
+        self.pending = pending
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        await asyncio.sleep(self.latency)
+        if self.pending is not None:
+            self.pending[0] -= 1
+            if self.pending[0] == 0:
+                self.delivered.set()
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+class LegacyConnectionManager:
+    """The sequential broadcast this benchmark replaced, kept verbatim for comparison."""
+
+    def __init__(self):
+        self.active_connections = {}
+
+    async def connect(self, websocket, project_id: str):
+        await websocket.accept()
+        if project_id not in self.active_connections:
+            self.active_connections[project_id] = []
+        self.active_connections[project_id].append(websocket)
+
+    async def broadcast(self, message: str, project_id: str):
+        logging.info(f"Broadcasting to project {project_id}. Connections: {len(self.active_connections.get(project_id, []))}")
+        if project_id in self.active_connections:
+            for i, connection in enumerate(self.active_connections[project_id]):
+                try:
+                    logging.info(f"Sending to connection {i} for project {project_id}...")
+                    await connection.send_text(message)
+                    logging.info(f"Successfully sent to connection {i} for project {project_id}.")
+                except Exception as e:
+                    logging.error(f"Failed to send to connection {i} for project {project_id}: {e}")
+        logging.info(f"Finished broadcasting to project {project_id}.")
+
+
+async def run(manager, args) -> dict:
+    delivered = asyncio.Event()
+    pending = [args.sockets - args.slow]
+    # Spread the slow sockets through the channel so they sit in front of fast ones
+    step = args.sockets // args.slow if args.slow else args.sockets + 1
+    for i in range(args.sockets):
+        if args.slow and i % step == 0 and i // step < args.slow:
+            await manager.connect(SimulatedSocket(args.slow_latency), PROJECT_ID)
+        else:
+            await manager.connect(SimulatedSocket(args.latency, delivered, pending), PROJECT_ID)
+
+    message = '{"type": "task_updated", "data": {"id": "benchmark"}}'
+    start = time.perf_counter()
+    await manager.broadcast(message, PROJECT_ID)
+    returned = time.perf_counter() - start
+    await delivered.wait()
+    all_fast = time.perf_counter() - start
+    # Give the slow sends time to hit the send timeout before counting evictions
+    await asyncio.sleep(args.send_timeout * 2)
+    return {
+        "returned": returned,
+        "fast_delivered": all_fast,
+        "evicted": getattr(manager, "evictions", 0),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sockets", type=int, default=5000)
+    parser.add_argument("--slow", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.001, help="seconds per send for a healthy client")
+    parser.add_argument("--slow-latency", type=float, default=2.0, help="seconds per send for a congested client")
+    parser.add_argument("--send-timeout", type=float, default=0.5)
+    args = parser.parse_args()
+
+    # The legacy manager logs at INFO on every send; pay for formatting and emitting, not for a terminal
+    logging.basicConfig(level=logging.INFO, stream=open(os.devnull, "w"))
+
+    print(f"{args.sockets} sockets, {args.slow} slow ({args.slow_latency}s/send), healthy sends {args.latency * 1000:.1f}ms")
+    print(f"{'manager':<12}{'caller blocked':>16}{'all fast sockets':>18}{'evicted':>9}")
+    for name, manager in (
+        ("legacy", LegacyConnectionManager()),
+        ("queued", ConnectionManager("project", InMemoryPubSub(), send_timeout=args.send_timeout)),
+    ):
+        result = await run(manager, args)
+        print(f"{name:<12}{result['returned'] * 1000:>14.1f}ms{result['fast_delivered'] * 1000:>16.1f}ms{result['evicted']:>9}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
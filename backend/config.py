@@ -1,18 +1,106 @@
 import os
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     # For PostgreSQL Database
     DATABASE_URL: str
 
+    # Connection pool tuning, applied to both the sync and async engines
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
     # Secret for signing our own custom JWTs
     JWT_SECRET_KEY: str
 
     # Algorithm for our custom JWTs
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
+    # Fraction of a token's lifetime after which responses carry a refreshed token in X-New-Token
+    TOKEN_REFRESH_THRESHOLD: float = 0.5
+    # bcrypt work factor (2^rounds iterations); stored hashes with another cost are upgraded on login
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    # Token buckets in front of /auth/login and /auth/register, per client IP and per email:
+    # BURST attempts at once, refilled at PER_MINUTE. Set RATE_LIMIT_URL (redis://...) to share
+    # them between workers, and RATE_LIMIT_TRUSTED_PROXIES to the number of proxies that append
+    # to X-Forwarded-For in front of the app.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_URL: Optional[str] = None
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMIT_TRUSTED_PROXIES: int = 0
+    LOGIN_IP_PER_MINUTE: float = 30
+    LOGIN_IP_BURST: int = 20
+    LOGIN_EMAIL_PER_MINUTE: float = 5
+    LOGIN_EMAIL_BURST: int = 10
+    REGISTER_IP_PER_MINUTE: float = 5
+    REGISTER_IP_BURST: int = 10
+    REGISTER_EMAIL_PER_MINUTE: float = 2
+    REGISTER_EMAIL_BURST: int = 5
+    # Authenticated user cache. Set USER_CACHE_URL (redis://...) to share it between workers;
+    # a TTL of 0 disables caching.
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 10000
+    USER_CACHE_URL: Optional[str] = None
+
+    # Background notification dispatch
+    NOTIFICATION_QUEUE_MAX_SIZE: int = 1000
+    NOTIFICATION_QUEUE_WORKERS: int = 2
+    NOTIFICATION_QUEUE_PUT_TIMEOUT: float = 1.0
+    NOTIFICATION_QUEUE_DRAIN_TIMEOUT: float = 10.0
+    NOTIFICATION_OUTBOX_ENABLED: bool = False
+
+    # Listing totals for count=cached, least recently used dropped beyond MAX_SIZE
+    COUNT_CACHE_TTL_SECONDS: int = 30
+    COUNT_CACHE_MAX_SIZE: int = 10000
+    # Resolved project/team access per user; membership changes on this worker drop it at once
+    PERMISSION_CACHE_TTL_SECONDS: int = 10
+    # Projects' member and per-status task counters are recomputed every INTERVAL seconds
+    # (0 disables the job; /admin/repair/project-counters runs it on demand), BATCH_SIZE projects per transaction
+    PROJECT_COUNTER_REPAIR_INTERVAL_SECONDS: int = 3600
+    PROJECT_COUNTER_REPAIR_BATCH_SIZE: int = 500
+
+    # User search for the member pickers: "trigram" (SQL ILIKE, indexed by pg_trgm on PostgreSQL),
+    # "prefix" (in-process word-prefix index) or "auto" (trigram on PostgreSQL, prefix elsewhere).
+    # Identical searches within USER_SEARCH_CACHE_TTL_SECONDS are answered from memory.
+    USER_SEARCH_BACKEND: str = "auto"
+    USER_SEARCH_CACHE_TTL_SECONDS: int = 5
+    USER_SEARCH_CACHE_MAX_SIZE: int = 2000
+    USER_SEARCH_INDEX_TTL_SECONDS: int = 60
+
+    # WebSocket fan-out: each connection has a bounded outbound queue drained by its own
+    # sender; a client whose queue fills up or whose send times out is disconnected.
+    WS_SEND_TIMEOUT: float = 5.0
+    WS_OUTBOUND_QUEUE_SIZE: int = 100
+    WS_DEBUG_LOGGING: bool = False
+    # How broadcasts reach sockets held by other workers: "memory" (single worker),
+    # "redis" (WS_PUBSUB_URL) or "postgres" (LISTEN/NOTIFY on WS_PUBSUB_URL, default DATABASE_URL)
+    WS_PUBSUB_BACKEND: str = "memory"
+    WS_PUBSUB_URL: Optional[str] = None
+    # Send task_updated with only the fields that changed (plus id and project_id) instead of the full task
+    WS_TASK_DELTA_UPDATES: bool = False
+    # Inbound control messages per socket: a token bucket refilled at WS_INBOUND_RATE per second
+    # holding at most WS_INBOUND_BURST; a client that runs it dry is disconnected.
+    WS_INBOUND_RATE: float = 5.0
+    WS_INBOUND_BURST: int = 20
+    WS_MAX_SUBSCRIPTIONS: int = 60
+    # The server sends {"type": "ping"} every WS_HEARTBEAT_INTERVAL seconds; a socket that has
+    # sent nothing (clients answer with {"action": "pong"}) for WS_IDLE_TIMEOUT is closed.
+    WS_HEARTBEAT_INTERVAL: float = 25.0
+    WS_IDLE_TIMEOUT: float = 60.0
+    # Recent task events kept per project (for at most WS_REPLAY_MAX_PROJECTS projects) so a
+    # reconnecting client can resubscribe with since=<seq> instead of refetching its lists
+    WS_REPLAY_BUFFER_SIZE: int = 200
+    WS_REPLAY_MAX_PROJECTS: int = 1000
+
     CORS_ORIGINS: str = "http://localhost:3000,https://project-hub-peach.vercel.app"
 
+    # Comma-separated emails of the users allowed to call /api/admin/*; empty closes those routes to everyone
+    ADMIN_EMAILS: str = ""
+
     class Config:
         env_file = ".env"
 
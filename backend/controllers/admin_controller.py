@@ -0,0 +1,39 @@
+from models import database
+from models.pool_metrics import pool_status
+from services.user_cache import user_cache
+from services import rate_limit
+from services.permissions import permission_resolver
+from services.notification_queue import notification_queue
+from services.project_counters import counter_repair_job
+from websocket_manager import manager, notification_manager
+
+async def get_db_pool_metrics():
+    return {
+        "sync": pool_status(database.engine.pool),
+        "async": pool_status(database.async_engine.pool),
+    }
+
+async def get_user_cache_metrics():
+    return user_cache.stats()
+
+async def get_permission_cache_metrics():
+    return permission_resolver.stats()
+
+async def get_rate_limit_metrics():
+    return rate_limit.stats()
+
+async def get_notification_queue_metrics():
+    return notification_queue.stats()
+
+async def get_project_counter_metrics():
+    return counter_repair_job.stats()
+
+async def repair_project_counters():
+    repaired = await counter_repair_job.run_once()
+    return {"repaired": repaired}
+
+async def get_websocket_metrics():
+    return {
+        "projects": manager.stats(),
+        "notifications": notification_manager.stats(),
+    }
@@ -1,24 +1,22 @@
-from fastapi import HTTPException, status, Depends
+from fastapi import HTTPException, Request, status, Depends
 from datetime import timedelta
+from typing import Optional
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
 from models import schemas
-from models.database import get_db
+from models.database import get_db, get_async_db
 from middleware.auth import create_access_token, get_current_user
 from config import settings
-from passlib.context import CryptContext
+from services.passwords import hash_password, reject_unknown_user, verify_password
+from services import rate_limit
+from services.user_search import user_search
 
-# Password Hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+async def register_user(user_data: schemas.UserCreate, request: Request, db: Session = Depends(get_db)):
+    rate_limit.register_ip_limiter.hit(rate_limit.client_ip(request))
+    rate_limit.register_email_limiter.hit(rate_limit.normalize_email(user_data.email))
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
-
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-async def register_user(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
     # Check if user already exists
     db_user_by_email = db.query(schemas.User).filter(schemas.User.email == user_data.email).first()
     if db_user_by_email:
@@ -27,7 +25,7 @@ async def register_user(user_data: schemas.UserCreate, db: Session = Depends(get
     if db_user_by_username:
         raise HTTPException(status_code=400, detail="Username already exists.")
 
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await hash_password(user_data.password)
     db_user = schemas.User(
         username=user_data.username,
         full_name=user_data.full_name,
@@ -38,18 +36,35 @@ async def register_user(user_data: schemas.UserCreate, db: Session = Depends(get
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    user_search.invalidate()
     
     return db_user
 
-async def login_user(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
+async def login_user(user_credentials: schemas.UserLogin, request: Request, db: Session = Depends(get_db)):
+    email_key = rate_limit.normalize_email(user_credentials.email)
+    rate_limit.login_ip_limiter.hit(rate_limit.client_ip(request))
+    # Only failed attempts spend the email's tokens; here we just refuse once they are gone
+    rate_limit.login_email_limiter.hit(email_key, cost=0)
+
     user = db.query(schemas.User).filter(schemas.User.email == user_credentials.email).first()
-    if not user or not verify_password(user_credentials.password, user.hashed_password):
+    if user:
+        is_valid, new_hash = await verify_password(user_credentials.password, user.hashed_password)
+    else:
+        is_valid, new_hash = False, None
+        await reject_unknown_user()
+    if not is_valid:
+        rate_limit.login_email_limiter.hit(email_key)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password.",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+
+    # The stored hash was made with a different BCRYPT_ROUNDS; store one at the current cost
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
+
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": str(user.id)},
@@ -61,12 +76,8 @@ async def login_user(user_credentials: schemas.UserLogin, db: Session = Depends(
 async def get_current_user_info(current_user: schemas.User = Depends(get_current_user)):
     return current_user
 
-async def search_users(query: str, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_user)):
-    users = db.query(schemas.User).filter(
-        schemas.User.username.ilike(f"%{query}%"),
-        schemas.User.id != str(current_user.id)
-    ).all()
-    return users
+async def search_users(query: str, limit: int, cursor: Optional[str], current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
+    return await user_search.search(db, query, limit, cursor, exclude_id=str(current_user.id))
 
 async def get_user_by_id_info(user_id: str, db: Session = Depends(get_db)):
     user = db.query(schemas.User).filter(schemas.User.id == user_id).first()
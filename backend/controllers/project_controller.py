@@ -1,14 +1,31 @@
 from fastapi import HTTPException, Depends
-from typing import List
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, and_, select
+from sqlalchemy.orm import selectinload
 import logging
 
 from models import schemas
-from models.database import get_db
-from services import notification_service
+from models.database import get_async_db
+from services.notification_queue import notification_queue
+from services.pagination import keyset_page, next_cursor
+from services.count_strategy import count_cache
+from services.permissions import MEMBER_ROLE, OWNER_ROLE, Permission, permission_resolver, require_project, require_team
+from services.project_counters import adjust_member_count
 
-async def create_project(project_data: schemas.ProjectCreate, current_user: schemas.User, db: Session = Depends(get_db)):
+# Query builders shared with benchmarks/query_plans.py
+
+def personal_projects_query(owner_id: str):
+    """Personal projects: no team, owned by the user."""
+    return select(schemas.Project).filter(and_(schemas.Project.team_id.is_(None), schemas.Project.owner_id == owner_id))
+
+def team_projects_query(team_id: str):
+    return select(schemas.Project).filter(schemas.Project.team_id == team_id)
+
+def project_page(query, cursor: Optional[str], page: int, per_page: int):
+    return keyset_page(query, [schemas.Project.created_at, schemas.Project.id], cursor, page, per_page)
+
+async def create_project(project_data: schemas.ProjectCreate, current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
     try:
         # Common project data
         new_project_data = {
@@ -19,17 +36,14 @@ async def create_project(project_data: schemas.ProjectCreate, current_user: sche
 
         if project_data.team_id:
             # Team Project Logic
-            team = db.query(schemas.Team).filter(schemas.Team.id == project_data.team_id).first()
-            if not team:
-                raise HTTPException(status_code=404, detail=f"Team with ID {project_data.team_id} not found")
-            
-            if str(team.owner_id) != str(current_user.id):
-                raise HTTPException(status_code=403, detail="Only the team owner can create projects for the team.")
+            await require_team(db, current_user, project_data.team_id, Permission.EDIT, "Only the team owner can create projects for the team.")
+            result = await db.execute(select(schemas.Team).options(selectinload(schemas.Team.members), selectinload(schemas.Team.owner)).filter(schemas.Team.id == project_data.team_id))
+            team = result.scalars().first()
 
             new_project_data["team_id"] = project_data.team_id
             new_project = schemas.Project(**new_project_data)
             db.add(new_project)
-            db.flush() # Flush to get the new_project.id
+            await db.flush() # Flush to get the new_project.id
 
             # Add all team members to the project, including the owner
             all_team_members = team.members
@@ -37,173 +51,116 @@ async def create_project(project_data: schemas.ProjectCreate, current_user: sche
                 all_team_members.append(team.owner)
 
             for member in all_team_members:
-                role = "Owner" if str(member.id) == str(current_user.id) else "Member"
+                role = OWNER_ROLE if str(member.id) == str(current_user.id) else MEMBER_ROLE
                 project_member = schemas.ProjectMemberRole(project_id=new_project.id, user_id=member.id, role=role)
                 db.add(project_member)
+            new_project.member_count = len(all_team_members)
         else:
             # Personal Project Logic
             new_project = schemas.Project(**new_project_data)
             db.add(new_project)
-            db.flush() # Flush to get the new_project.id
+            await db.flush() # Flush to get the new_project.id
 
             # Add only the owner as a member
-            project_member = schemas.ProjectMemberRole(project_id=new_project.id, user_id=str(current_user.id), role="Owner")
+            project_member = schemas.ProjectMemberRole(project_id=new_project.id, user_id=str(current_user.id), role=OWNER_ROLE)
             db.add(project_member)
+            new_project.member_count = 1
             all_team_members = [] # No one to notify for personal projects
 
         # Send notifications to all members except the owner
-        for member in all_team_members:
-            if str(member.id) != str(current_user.id):
-                await notification_service.create_project_invitation_notification(
-                    project_id=new_project.id,
-                    invited_user_id=member.id,
-                    inviter_user_id=current_user.id,
-                    db=db
-                )
-
-        db.commit()
-        db.refresh(new_project)
+        notification_queue.stage(
+            'project_invitation', new_project.id,
+            [member.id for member in all_team_members if str(member.id) != str(current_user.id)],
+            current_user.id, db
+        )
+
+        await db.commit()
+        await notification_queue.dispatch(db)
         return new_project
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logging.error(f"Error creating project: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error while creating project: {e}")
 
-async def get_user_projects(current_user: schemas.User, db: Session = Depends(get_db), page: int = 1, per_page: int = 20):
+async def get_user_projects(current_user: schemas.User, db: AsyncSession = Depends(get_async_db), page: int = 1, per_page: int = 20, cursor: Optional[str] = None, with_total: bool = True):
     # Subquery to get project IDs the user is a member of
-    user_project_ids_query = db.query(schemas.ProjectMemberRole.project_id).filter(schemas.ProjectMemberRole.user_id == current_user.id)
+    user_project_ids_query = select(schemas.ProjectMemberRole.project_id).filter(schemas.ProjectMemberRole.user_id == current_user.id)
     
     # Main query for projects
-    query = db.query(schemas.Project).filter(schemas.Project.id.in_(user_project_ids_query))
+    query = select(schemas.Project).filter(schemas.Project.id.in_(user_project_ids_query))
     
-    total_count = query.count()
-    
-    # Subquery for member count
-    member_count_subquery = db.query(
-        schemas.ProjectMemberRole.project_id,
-        func.count(schemas.ProjectMemberRole.user_id).label("member_count")
-    ).group_by(schemas.ProjectMemberRole.project_id).subquery()
-
-    # Join with member count
-    query = query.outerjoin(member_count_subquery, schemas.Project.id == member_count_subquery.c.project_id)
-    query = query.add_columns(func.coalesce(member_count_subquery.c.member_count, 0).label("member_count"))
-
-    projects_with_counts = query.offset((page - 1) * per_page).limit(per_page).all()
-
-    projects_summary = [
-        schemas.ProjectSummary(
-            id=p.id, name=p.name, description=p.description, owner_id=p.owner_id,
-            team_id=p.team_id, created_at=p.created_at, member_count=mc
-        ) for p, mc in projects_with_counts
-    ]
-
-    return schemas.PaginatedProjectSummaryResponse(projects=projects_summary, total_count=total_count)
-
-async def get_personal_projects(current_user: schemas.User, db: Session = Depends(get_db), page: int = 1, per_page: int = 20):
-    # Main query for personal projects (team_id is None and user is owner)
-    query = db.query(schemas.Project).filter(
-        and_(
-            schemas.Project.team_id.is_(None),
-            schemas.Project.owner_id == str(current_user.id)
-        )
-    )
-    
-    total_count = query.count()
-    
-    # Subquery for member count (will always be 1 for personal projects, but good for consistency)
-    member_count_subquery = db.query(
-        schemas.ProjectMemberRole.project_id,
-        func.count(schemas.ProjectMemberRole.user_id).label("member_count")
-    ).group_by(schemas.ProjectMemberRole.project_id).subquery()
-
-    # Join with member count
-    query = query.outerjoin(member_count_subquery, schemas.Project.id == member_count_subquery.c.project_id)
-    query = query.add_columns(func.coalesce(member_count_subquery.c.member_count, 0).label("member_count"))
-
-    projects_with_counts = query.order_by(schemas.Project.created_at.desc()).offset((page - 1) * per_page).limit(per_page).all()
-
-    projects_summary = [
-        schemas.ProjectSummary(
-            id=p.id, name=p.name, description=p.description, owner_id=p.owner_id,
-            team_id=p.team_id, created_at=p.created_at, updated_at=p.updated_at, member_count=mc
-        ) for p, mc in projects_with_counts
-    ]
-
-    return schemas.PaginatedProjectSummaryResponse(projects=projects_summary, total_count=total_count)
-
-async def get_project_by_id(project_id: str, current_user: schemas.User, db: Session = Depends(get_db)):
-    project = db.query(schemas.Project).filter(schemas.Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found.")
-
-    # Check for membership
-    member_role = db.query(schemas.ProjectMemberRole).filter(
-        schemas.ProjectMemberRole.project_id == project_id,
-        schemas.ProjectMemberRole.user_id == current_user.id
-    ).first()
-
-    if not member_role:
-        raise HTTPException(status_code=403, detail="Access denied: You do not have permission to access this project.")
+    total_count = None
+    if with_total:
+        total_count = (await db.execute(select(func.count()).select_from(query.subquery()))).scalar_one()
+
+    # member_count and the task counters are columns on the project, so the page needs no aggregate
+    projects = (await db.execute(project_page(query, cursor, page, per_page))).scalars().all()
+    cursor = next_cursor(projects, per_page, lambda p: (p.created_at, p.id))
+
+    projects_summary = [schemas.ProjectSummary.model_validate(p) for p in projects]
+
+    return schemas.PaginatedProjectSummaryResponse(projects=projects_summary, total_count=total_count, next_cursor=cursor)
+
+async def get_personal_projects(current_user: schemas.User, db: AsyncSession = Depends(get_async_db), page: int = 1, per_page: int = 20, cursor: Optional[str] = None, with_total: bool = True):
+    query = personal_projects_query(str(current_user.id))
     
-    return project
+    total_count = None
+    if with_total:
+        total_count = (await db.execute(select(func.count()).select_from(query.subquery()))).scalar_one()
+
+    # member_count and the task counters are columns on the project, so the page needs no aggregate
+    projects = (await db.execute(project_page(query, cursor, page, per_page))).scalars().all()
+    cursor = next_cursor(projects, per_page, lambda p: (p.created_at, p.id))
+
+    projects_summary = [schemas.ProjectSummary.model_validate(p) for p in projects]
+
+    return schemas.PaginatedProjectSummaryResponse(projects=projects_summary, total_count=total_count, next_cursor=cursor)
 
-async def delete_project(project_id: str, current_user: schemas.User, db: Session = Depends(get_db)):
-    project = db.query(schemas.Project).filter(schemas.Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found.")
+async def get_project_by_id(project_id: str, current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
+    await require_project(db, current_user, project_id, Permission.READ, "Access denied: You do not have permission to access this project.")
+    # Already in the session when the resolver just loaded it; one primary key query after a cache hit
+    return await db.get(schemas.Project, project_id)
 
-    if str(project.owner_id) != str(current_user.id):
-        raise HTTPException(status_code=403, detail="Only the project owner can delete the project.")
+async def delete_project(project_id: str, current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
+    await require_project(db, current_user, project_id, Permission.DELETE, "Only the project owner can delete the project.")
+    project = await db.get(schemas.Project, project_id)
 
     # Get project members before deleting the project
-    members = db.query(schemas.ProjectMemberRole).filter(schemas.ProjectMemberRole.project_id == project_id).all()
+    result = await db.execute(select(schemas.ProjectMemberRole).filter(schemas.ProjectMemberRole.project_id == project_id))
+    members = result.scalars().all()
     project_name = project.name
 
-    db.delete(project)
-    db.commit()
+    await db.delete(project)
 
     # Send notifications to all members
-    for member in members:
-        if str(member.user_id) != str(current_user.id):
-            await notification_service.create_project_deleted_notification(
-                project_id=project_id,
-                project_name=project_name,
-                user_id=member.user_id,
-                remover_user_id=current_user.id,
-                db=db
-            )
-
-    return {"message": "Project deleted successfully."}
+    notification_queue.stage(
+        'project_deleted', project_id,
+        [member.user_id for member in members if str(member.user_id) != str(current_user.id)],
+        current_user.id, db, project_name=project_name
+    )
 
-async def get_projects_for_team(team_id: str, current_user: schemas.User, db: Session = Depends(get_db)):
-    team = db.query(schemas.Team).filter(schemas.Team.id == team_id).first()
-    if not team:
-        raise HTTPException(status_code=404, detail="Team not found.")
+    await db.commit()
+    count_cache.invalidate(f"project:{project_id}", *[f"user:{member.user_id}" for member in members])
+    permission_resolver.invalidate_project(project_id)
+    await notification_queue.dispatch(db)
 
-    member_ids = [member.id for member in team.members]
-    if current_user.id not in member_ids and team.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Access denied: You do not have permission to access this team.")
+    return {"message": "Project deleted successfully."}
 
-    return db.query(schemas.Project).filter(schemas.Project.team_id == team_id).all()
+async def get_projects_for_team(team_id: str, current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
+    await require_team(db, current_user, team_id, Permission.READ, "Access denied: You do not have permission to access this team.")
 
-async def add_project_member(project_id: str, member_data: schemas.AddMemberRequest, current_user: schemas.User, db: Session = Depends(get_db)):
-    project = db.query(schemas.Project).filter(schemas.Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found.")
+    result = await db.execute(team_projects_query(team_id))
+    return result.scalars().all()
 
-    # Authorization: Check if user is the project owner
-    if str(project.owner_id) != str(current_user.id):
-        raise HTTPException(status_code=403, detail="Only the project owner can add members.")
+async def add_project_member(project_id: str, member_data: schemas.AddMemberRequest, current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
+    await require_project(db, current_user, project_id, Permission.MANAGE_MEMBERS, "Only the project owner can add members.")
 
-    user_to_add = db.query(schemas.User).filter(schemas.User.id == member_data.userId).first()
+    user_to_add = await db.get(schemas.User, member_data.userId)
     if not user_to_add:
         raise HTTPException(status_code=404, detail="User not found.")
 
     # Check if user is already a member
-    existing_member = db.query(schemas.ProjectMemberRole).filter(
-        schemas.ProjectMemberRole.project_id == project_id,
-        schemas.ProjectMemberRole.user_id == member_data.userId
-    ).first()
+    existing_member = await db.get(schemas.ProjectMemberRole, (project_id, member_data.userId))
     if existing_member:
         raise HTTPException(status_code=400, detail="User is already a member of this project.")
 
@@ -211,18 +168,18 @@ async def add_project_member(project_id: str, member_data: schemas.AddMemberRequ
     new_member = schemas.ProjectMemberRole(
         project_id=project_id,
         user_id=member_data.userId,
-        role="Member"  # Or get role from member_data if available
+        role=MEMBER_ROLE  # Never OWNER_ROLE: owner rights come from project.owner_id
     )
     db.add(new_member)
-    db.commit()
+    await adjust_member_count(project_id, 1, db)
 
     # Create a notification for the added member
-    await notification_service.create_project_invitation_notification(
-        project_id=project_id,
-        invited_user_id=member_data.userId,
-        inviter_user_id=current_user.id,
-        db=db
+    notification_queue.stage(
+        'project_invitation', project_id, [member_data.userId], current_user.id, db
     )
 
-    db.refresh(new_member)
+    await db.commit()
+    permission_resolver.invalidate_project(project_id)
+    await notification_queue.dispatch(db)
+
     return {"message": "Member added successfully."}
\ No newline at end of file
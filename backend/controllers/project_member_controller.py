@@ -1,25 +1,28 @@
 from fastapi import HTTPException, Depends
-from typing import List
-from sqlalchemy.orm import Session
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from sqlalchemy.orm import selectinload
 
 from models import schemas
-from models.database import get_db
-from services import notification_service
-
-async def get_project_members(project_id: str, current_user: schemas.User, db: Session = Depends(get_db), page: int = 1, per_page: int = 20) -> schemas.PaginatedProjectMemberResponse:
-    # Authorization: Check if user is a member of the project
-    member_check = db.query(schemas.ProjectMemberRole).filter(
-        schemas.ProjectMemberRole.project_id == project_id,
-        schemas.ProjectMemberRole.user_id == current_user.id
-    ).first()
-    if not member_check:
-        raise HTTPException(status_code=403, detail="You are not a member of this project.")
+from models.database import get_async_db
+from services.notification_queue import notification_queue
+from services.pagination import keyset_page, next_cursor
+from services.permissions import Permission, permission_resolver, require_project
 
-    # Get total count for pagination
-    total_count = db.query(schemas.ProjectMemberRole).filter(schemas.ProjectMemberRole.project_id == project_id).count()
+async def get_project_members(project_id: str, current_user: schemas.User, db: AsyncSession = Depends(get_async_db), page: int = 1, per_page: int = 20, cursor: Optional[str] = None, with_total: bool = True) -> schemas.PaginatedProjectMemberResponse:
+    await require_project(db, current_user, project_id, Permission.READ, "You are not a member of this project.")
 
-    # Get members for the current page
-    members_db = db.query(schemas.ProjectMemberRole).filter(schemas.ProjectMemberRole.project_id == project_id).offset((page - 1) * per_page).limit(per_page).all()
+    # Get total count for pagination
+    total_count = None
+    if with_total:
+        total_count = (await db.execute(select(func.count()).select_from(schemas.ProjectMemberRole).filter(schemas.ProjectMemberRole.project_id == project_id))).scalar_one()
+
+    # Get members for the current page. The table has no created_at, so the cursor is keyed on user_id.
+    query = select(schemas.ProjectMemberRole).options(selectinload(schemas.ProjectMemberRole.user)).filter(schemas.ProjectMemberRole.project_id == project_id)
+    result = await db.execute(keyset_page(query, [schemas.ProjectMemberRole.user_id], cursor, page, per_page, descending=False))
+    members_db = list(result.scalars().all())
+    cursor = next_cursor(members_db, per_page, lambda member: (member.user_id,))
     
     # Manually construct the response to include user details
     project_members = [
@@ -31,32 +34,30 @@ async def get_project_members(project_id: str, current_user: schemas.User, db: S
         ) for member in members_db
     ]
     
-    return schemas.PaginatedProjectMemberResponse(members=project_members, total_count=total_count)
+    return schemas.PaginatedProjectMemberResponse(members=project_members, total_count=total_count, next_cursor=cursor)
 
-async def update_project_member_role(project_id: str, user_id: str, role_update: schemas.ProjectMemberUpdate, current_user: schemas.User, db: Session = Depends(get_db)):
-    # Authorization: Check if user is the project owner
-    project = db.query(schemas.Project).filter(schemas.Project.id == project_id).first()
-    if not project or str(project.owner_id) != str(current_user.id):
-        raise HTTPException(status_code=403, detail="Only the project owner can update roles.")
+async def update_project_member_role(project_id: str, user_id: str, role_update: schemas.ProjectMemberUpdate, current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
+    access = await require_project(db, current_user, project_id, Permission.MANAGE_MEMBERS, "Only the project owner can update roles.")
 
-    member_role = db.query(schemas.ProjectMemberRole).filter(
-        schemas.ProjectMemberRole.project_id == project_id,
-        schemas.ProjectMemberRole.user_id == user_id
-    ).first()
+    if role_update.role not in await permission_resolver.assignable_roles(db):
+        raise HTTPException(status_code=400, detail=f"Role '{role_update.role}' cannot be assigned.")
+
+    member_role = await db.get(schemas.ProjectMemberRole, (project_id, user_id))
 
     if not member_role:
         raise HTTPException(status_code=404, detail="Member not found.")
+    if user_id == access.owner_id:
+        raise HTTPException(status_code=400, detail="The project owner's role cannot be changed.")
 
     member_role.role = role_update.role
-    db.commit()
 
     # Create a notification for the user whose role was changed
-    await notification_service.create_role_changed_notification(
-        project_id=project_id,
-        user_id=user_id,
-        new_role=role_update.role,
-        changer_user_id=current_user.id,
-        db=db
+    notification_queue.stage(
+        'role_changed', project_id, [user_id], current_user.id, db, new_role=role_update.role
     )
 
+    await db.commit()
+    permission_resolver.invalidate_project(project_id)
+    await notification_queue.dispatch(db)
+
     return {"message": "Role updated successfully."}
\ No newline at end of file
@@ -4,6 +4,7 @@ import logging
 
 from models import schemas
 from models.database import get_db
+from services.permissions import permission_resolver
 
 async def get_role_by_id(role_id: str, db: Session = Depends(get_db)):
     role = db.query(schemas.Role).filter(schemas.Role.id == role_id).first()
@@ -29,6 +30,7 @@ async def initialize_default_roles(db: Session = Depends(get_db)):
         
         if created_roles:
             db.commit()
+            permission_resolver.invalidate_roles()
             return {"message": f"Default roles initialized: {', '.join(created_roles)}"}
         else:
             return {"message": "Default roles already exist."}
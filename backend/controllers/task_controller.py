@@ -1,44 +1,155 @@
-from fastapi import HTTPException, Depends
+from fastapi import HTTPException, Depends, Response
 from typing import List, Optional
-from datetime import datetime, timezone
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from sqlalchemy.orm import joinedload
-from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, select, inspect
+from sqlalchemy.orm import selectinload
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 import logging
 import json
 
+from config import settings
 from models import schemas
-from models.database import get_db
-from services import notification_service
-from websocket_manager import manager
-
-async def broadcast_task_update(task: schemas.Task):
+from models.database import get_async_db
+from services.notification_queue import notification_queue
+from services.pagination import keyset_page, next_cursor
+from services.count_strategy import CountMode, count_cache, resolve_total
+from services.permissions import Permission, permission_resolver, require_project
+from services.project_counters import adjust_task_counts
+from services.task_fields import lean_task_query, lean_task_rows, parse_fields, task_page_model
+from websocket_manager import manager, project_channel
+
+def _task_message(event_type: str, task: schemas.Task, fields: Optional[set] = None, model=schemas.TaskSummary) -> str:
+    # Serialized once per event straight to JSON; the same string is queued for every socket
+    data = model.model_validate(task).model_dump_json(include=fields)
+    return f'{{"type": "{event_type}", "data": {data}}}'
+
+def _changed_fields(task: schemas.Task) -> set:
+    """Task attributes modified in this session; read before commit, which resets the history."""
+    changed = {attr.key for attr in inspect(task).attrs if attr.history.has_changes()}
+    if "assignees" in changed:
+        changed.add("assignee_ids")
+    return changed
+
+async def _broadcast_task_event(event_type: str, message: str, project_id: str, assignee_ids):
+    # The owner's feed gets every event; other members only hear about tasks assigned to them
+    await manager.broadcast(message, project_channel(str(project_id), event_type))
+    for user_id in set(map(str, assignee_ids)):
+        await manager.broadcast(message, project_channel(str(project_id), event_type, user_id))
+
+async def broadcast_task_update(task: schemas.Task, changed: Optional[set] = None, assignee_ids=None, model=schemas.TaskSummary):
     if task.project_id:
-        task_data = schemas.TaskResponse.from_orm(task)
-        await manager.broadcast(json.dumps({"type": "task_updated", "data": jsonable_encoder(task_data)}), str(task.project_id))
+        fields = None
+        if settings.WS_TASK_DELTA_UPDATES and changed is not None:
+            fields = changed | {"id", "project_id"}
+        message = _task_message("task_updated", task, fields, model)
+        await _broadcast_task_event("task_updated", message, task.project_id, task.assignee_ids if assignee_ids is None else assignee_ids)
 
 async def broadcast_task_creation(task: schemas.Task):
     if task.project_id:
-        task_data = schemas.TaskResponse.from_orm(task)
-        await manager.broadcast(json.dumps({"type": "task_created", "data": jsonable_encoder(task_data)}), str(task.project_id))
+        await _broadcast_task_event("task_created", _task_message("task_created", task), task.project_id, task.assignee_ids)
 
-async def broadcast_task_deletion(task_id: str, project_id: str):
+async def broadcast_task_deletion(task_id: str, project_id: str, assignee_ids):
     if project_id:
-        await manager.broadcast(json.dumps({"type": "task_deleted", "data": {"id": task_id}}), str(project_id))
+        message = json.dumps({"type": "task_deleted", "data": {"id": task_id}})
+        await _broadcast_task_event("task_deleted", message, project_id, assignee_ids)
+
+def _task_query():
+    return select(schemas.Task).options(selectinload(schemas.Task.assignees), selectinload(schemas.Task.project))
+
+def _task_with_submissions_query():
+    return _task_query().options(selectinload(schemas.Task.submissions))
+
+def _list_query(fields: Optional[frozenset]):
+    return _task_query() if fields is None else lean_task_query(fields)
+
+# Query builders for the task listings, shared with benchmarks/query_plans.py so the plan check
+# explains exactly the SQL these endpoints run
+
+def project_tasks_query(project_id: str, status: Optional[str] = None, assignee_id: Optional[str] = None, fields: Optional[frozenset] = None):
+    """A project's tasks; with assignee_id, only those assigned to that user (members without VIEW_ALL_TASKS)."""
+    query = _list_query(fields).filter(schemas.Task.project_id == project_id)
+    if assignee_id is not None:
+        query = query.filter(schemas.Task.assignees.any(id=assignee_id))
+    if status:
+        query = query.filter(schemas.Task.status == status)
+    return query
+
+def user_tasks_query(user_id: str, fields: Optional[frozenset] = None):
+    # A user's tasks are all tasks they are assigned to, keeping personal tasks in any
+    # status and project tasks that are not completed yet
+    return _list_query(fields).filter(
+        schemas.Task.assignees.any(id=user_id),
+        or_(
+            schemas.Task.project_id.is_(None),
+            and_(schemas.Task.project_id.isnot(None), schemas.Task.status != 'completed'),
+        ),
+    )
+
+def personal_tasks_query(owner_id: str, status: Optional[str] = None, fields: Optional[frozenset] = None):
+    query = _list_query(fields).filter(schemas.Task.owner_id == owner_id)
+    if status:
+        query = query.filter(schemas.Task.status == status)
+    return query
+
+def pending_approval_query(project_id: str, fields: Optional[frozenset] = None):
+    return _list_query(fields).filter(schemas.Task.project_id == project_id, schemas.Task.status == "pending_approval")
 
-async def create_task(task_data: schemas.TaskCreate, current_user: schemas.User, db: Session = Depends(get_db)):
+def task_page(query, cursor: Optional[str], page: int, per_page: int):
+    return keyset_page(query, [schemas.Task.created_at, schemas.Task.id], cursor, page, per_page)
+
+async def _can_manage_task(task: schemas.Task, current_user: schemas.User, db: AsyncSession) -> bool:
+    """Personal tasks are managed by their owner, project tasks by whoever holds MANAGE_TASKS in the project."""
+    if task.project_id is None:
+        return str(task.owner_id) == str(current_user.id)
+    access = await permission_resolver.project(db, current_user.id, task.project_id)
+    return access is not None and access.can(Permission.MANAGE_TASKS)
+
+async def _load_task(task_id: str, db: AsyncSession):
+    # populate_existing refreshes an already loaded instance, including its relationships
+    result = await db.execute(_task_with_submissions_query().filter(schemas.Task.id == task_id).execution_options(populate_existing=True))
+    return result.scalars().first()
+
+async def _count_status_change(task: schemas.Task, db: AsyncSession):
+    """Move the task between its project's status counters if its status changed in this session; call before commit."""
+    history = inspect(task).attrs.status.history
+    if history.added:
+        old_status = history.deleted[0] if history.deleted else None
+        await adjust_task_counts(task.project_id, old_status, history.added[0], db)
+
+def _invalidate_task_counts(task: schemas.Task, *user_ids: str):
+    """Drop cached listing totals that a created, deleted or re-statused task may have changed."""
+    tags = [f"user:{task.owner_id}"] + [f"user:{user_id}" for user_id in user_ids]
+    if task.project_id:
+        tags.append(f"project:{task.project_id}")
+    count_cache.invalidate(*tags)
+
+async def _paginate_tasks(query, db: AsyncSession, page: int, per_page: int, cursor: Optional[str] = None, with_total: bool = True, count: CountMode = "exact", count_key: tuple = None, count_tags: tuple = (), fields: Optional[frozenset] = None):
+    total_count = None
+    if with_total:
+        total_count = await resolve_total(query, db, count, count_key, count_tags)
+    if fields is not None:
+        # Sparse fieldset: query came from lean_task_query, and the page is serialized here with
+        # the model prebuilt for these fields; the routes document it through TASK_LIST_RESPONSES
+        rows = (await db.execute(task_page(query, cursor, page, per_page))).all()
+        cursor = next_cursor(rows, per_page, lambda row: (row.created_at, row.id))
+        tasks = await lean_task_rows(rows, fields, db)
+        page_model = task_page_model(fields)
+        return Response(page_model(tasks=tasks, total_count=total_count, next_cursor=cursor).model_dump_json(), media_type="application/json")
+    result = await db.execute(task_page(query, cursor, page, per_page))
+    tasks = list(result.scalars().all())
+    cursor = next_cursor(tasks, per_page, lambda task: (task.created_at, task.id))
+    return schemas.PaginatedTaskSummaryResponse(tasks=tasks, total_count=total_count, next_cursor=cursor)
+
+async def create_task(task_data: schemas.TaskCreate, current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
     try:
         assignees = []
         owner_id = None
         project_id = task_data.project_id
 
         if project_id:
-            project = db.query(schemas.Project).filter(schemas.Project.id == project_id).first()
-            if not project:
-                raise HTTPException(status_code=404, detail="Project not found.")
-            if str(project.owner_id) != str(current_user.id):
-                raise HTTPException(status_code=403, detail="Only the project owner can create tasks.")
+            await require_project(db, current_user, project_id, Permission.MANAGE_TASKS, "Only the project owner can create tasks.")
+            project = await db.get(schemas.Project, project_id)
 
             # If project has a team_id, it's a team project, so assignees are required.
             if project.team_id and not task_data.assignee_ids:
@@ -49,10 +160,11 @@ async def create_task(task_data: schemas.TaskCreate, current_user: schemas.User,
             
             owner_id = str(project.owner_id)
             if task_data.assignee_ids:
-                assignees = db.query(schemas.User).filter(schemas.User.id.in_(task_data.assignee_ids)).all()
+                result = await db.execute(select(schemas.User).filter(schemas.User.id.in_(task_data.assignee_ids)))
+                assignees = result.scalars().all()
         else:
             owner_id = str(current_user.id)
-            assignees = [current_user]
+            assignees = [await db.get(schemas.User, current_user.id)]
 
         new_task = schemas.Task(
             title=task_data.title,
@@ -63,313 +175,281 @@ async def create_task(task_data: schemas.TaskCreate, current_user: schemas.User,
             project_id=project_id,
             owner_id=owner_id,
             assigned_by=str(current_user.id),
-            assigned_at=datetime.now(timezone.utc),
+            assigned_at=schemas.utcnow(),
             assignees=assignees
         )
 
         db.add(new_task)
-        db.commit()
-        db.refresh(new_task)
+        await db.flush()
+        await adjust_task_counts(project_id, None, new_task.status, db)
 
         # Notify assignees, excluding the user who performed the action
-        if new_task.assignees:
-            assignees_to_notify = [a for a in new_task.assignees if str(a.id) != str(current_user.id)]
-            for assignee in assignees_to_notify:
-                await notification_service.create_task_assigned_notification(
-                    task_id=new_task.id,
-                    user_id=assignee.id,
-                    assigner_id=current_user.id,
-                    db=db
-                )
-        
+        notification_queue.stage(
+            'task_assigned', new_task.id,
+            [a.id for a in assignees if str(a.id) != str(current_user.id)],
+            current_user.id, db
+        )
+
+        await db.commit()
+        _invalidate_task_counts(new_task, *[str(a.id) for a in assignees])
+        await notification_queue.dispatch(db)
+        new_task = await _load_task(new_task.id, db)
         await broadcast_task_creation(new_task)
         return new_task
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logging.error(f"Error creating task: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error while creating task: {e}")
 
-async def get_project_tasks(project_id: str, status: Optional[str], current_user: schemas.User, db: Session = Depends(get_db), page: int = 1, per_page: int = 20):
-    project = db.query(schemas.Project).filter(schemas.Project.id == project_id).first()
-    if not project:
+async def get_project_tasks(project_id: str, status: Optional[str], current_user: schemas.User, db: AsyncSession = Depends(get_async_db), page: int = 1, per_page: int = 20, cursor: Optional[str] = None, with_total: bool = True, count: CountMode = "exact", fields: Optional[str] = None):
+    fields = parse_fields(fields)
+    access = await permission_resolver.project(db, current_user.id, project_id)
+    if access is None:
         raise HTTPException(status_code=404, detail="Project not found.")
     
-    is_owner = str(project.owner_id) == str(current_user.id)
-    query = db.query(schemas.Task).options(joinedload(schemas.Task.assignees)).filter(schemas.Task.project_id == project_id)
-    
-    if not is_owner:
-        query = query.filter(schemas.Task.assignees.any(id=current_user.id))
-
-    if status:
-        query = query.filter(schemas.Task.status == status)
-    
-    total_count = query.count()
-    tasks = query.order_by(schemas.Task.created_at.desc()).offset((page - 1) * per_page).limit(per_page).all()
-    return schemas.PaginatedTaskSummaryResponse(tasks=tasks, total_count=total_count)
-
-async def get_user_tasks(current_user: schemas.User, db: Session = Depends(get_db), page: int = 1, per_page: int = 20):
-    # A user's tasks are all tasks they are assigned to.
-    # From that set, we apply conditional filtering based on the task type.
-    base_query = db.query(schemas.Task).options(joinedload(schemas.Task.project)).filter(schemas.Task.assignees.any(id=current_user.id))
-
-    # We want to keep a task if:
-    # 1. It's a personal task (project_id is None), regardless of status.
-    # 2. It's a project task (project_id is not None) AND its status is not 'completed'.
-    filter_condition = or_(
-        schemas.Task.project_id.is_(None),
-        and_(
-            schemas.Task.project_id.isnot(None),
-            schemas.Task.status != 'completed'
-        )
-    )
-
-    query = base_query.filter(filter_condition)
-
-    total_count = query.count()
-    tasks = query.order_by(schemas.Task.created_at.desc()).offset((page - 1) * per_page).limit(per_page).all()
-    
-    return schemas.PaginatedTaskSummaryResponse(tasks=tasks, total_count=total_count)
-
-async def get_personal_tasks(status: Optional[str], current_user: schemas.User, db: Session = Depends(get_db), page: int = 1, per_page: int = 20):
-    query = db.query(schemas.Task).filter(schemas.Task.owner_id == str(current_user.id))
-    if status:
-        query = query.filter(schemas.Task.status == status)
-    total_count = query.count()
-    tasks = query.order_by(schemas.Task.created_at.desc()).offset((page - 1) * per_page).limit(per_page).all()
-    return schemas.PaginatedTaskSummaryResponse(tasks=tasks, total_count=total_count)
-
-async def get_task_by_id(task_id: str, current_user: schemas.User, db: Session = Depends(get_db)):
-    task = db.query(schemas.Task).options(joinedload(schemas.Task.assignees), joinedload(schemas.Task.project)).filter(schemas.Task.id == task_id).first()
+    assignee_id = None if access.can(Permission.VIEW_ALL_TASKS) else current_user.id
+    query = project_tasks_query(project_id, status, assignee_id, fields)
+    return await _paginate_tasks(query, db, page, per_page, cursor, with_total, count, ("project_tasks", str(current_user.id), project_id, status), (f"project:{project_id}",), fields)
+
+async def get_user_tasks(current_user: schemas.User, db: AsyncSession = Depends(get_async_db), page: int = 1, per_page: int = 20, cursor: Optional[str] = None, with_total: bool = True, count: CountMode = "exact", fields: Optional[str] = None):
+    fields = parse_fields(fields)
+    query = user_tasks_query(current_user.id, fields)
+    return await _paginate_tasks(query, db, page, per_page, cursor, with_total, count, ("user_tasks", str(current_user.id)), (f"user:{current_user.id}",), fields)
+
+async def get_personal_tasks(status: Optional[str], current_user: schemas.User, db: AsyncSession = Depends(get_async_db), page: int = 1, per_page: int = 20, cursor: Optional[str] = None, with_total: bool = True, count: CountMode = "exact", fields: Optional[str] = None):
+    fields = parse_fields(fields)
+    query = personal_tasks_query(str(current_user.id), status, fields)
+    return await _paginate_tasks(query, db, page, per_page, cursor, with_total, count, ("personal_tasks", str(current_user.id), status), (f"user:{current_user.id}",), fields)
+
+async def get_task_by_id(task_id: str, current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(_task_with_submissions_query().filter(schemas.Task.id == task_id))
+    task = result.scalars().first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found.")
     return task
 
-async def update_task(task_id: str, task_update: schemas.TaskUpdate, current_user: schemas.User, db: Session = Depends(get_db)):
+async def update_task(task_id: str, task_update: schemas.TaskUpdate, current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
     task = await get_task_by_id(task_id, current_user, db)
     original_assignee_ids = {str(a.id) for a in task.assignees}
 
     # Permission check
     is_personal_task = task.project_id is None
-    is_project_owner = not is_personal_task and task.project and str(task.project.owner_id) == str(current_user.id)
-    is_task_owner = is_personal_task and str(task.owner_id) == str(current_user.id)
-
-    if not is_project_owner and not is_task_owner:
+    if not await _can_manage_task(task, current_user, db):
         raise HTTPException(status_code=403, detail="You do not have permission to edit this task.")
 
     update_data = task_update.dict(exclude_unset=True)
     if 'assignee_ids' in update_data:
         if not is_personal_task:
-            project_member_ids = {str(m.user_id) for m in task.project.members}
+            result = await db.execute(select(schemas.ProjectMemberRole.user_id).filter(schemas.ProjectMemberRole.project_id == task.project_id))
+            project_member_ids = {str(user_id) for user_id in result.scalars().all()}
             if not set(update_data['assignee_ids']).issubset(project_member_ids):
                 raise HTTPException(status_code=400, detail="All assignees must be members of the project.")
         
-        assignees = db.query(schemas.User).filter(schemas.User.id.in_(update_data['assignee_ids'])).all()
-        task.assignees = assignees
+        result = await db.execute(select(schemas.User).filter(schemas.User.id.in_(update_data['assignee_ids'])))
+        task.assignees = result.scalars().all()
         del update_data['assignee_ids']
 
     for key, value in update_data.items():
         setattr(task, key, value)
 
-    db.commit()
-    db.refresh(task)
-
     # Notify newly added assignees, excluding the user who performed the action
     new_assignee_ids = {str(a.id) for a in task.assignees}
     added_assignee_ids = new_assignee_ids - original_assignee_ids
-    assignee_ids_to_notify = {uid for uid in added_assignee_ids if uid != str(current_user.id)}
-
-    if assignee_ids_to_notify:
-        for user_id in assignee_ids_to_notify:
-            await notification_service.create_task_assigned_notification(
-                task_id=task.id,
-                user_id=user_id,
-                assigner_id=current_user.id,
-                db=db
-            )
+    notification_queue.stage(
+        'task_assigned', task.id,
+        [uid for uid in added_assignee_ids if uid != str(current_user.id)],
+        current_user.id, db
+    )
 
     # Notify about status change
-    if 'status' in update_data and task.assignees:
-        for assignee in task.assignees:
-            if str(assignee.id) != str(current_user.id):
-                await notification_service.create_task_status_changed_notification(
-                    task_id=task.id,
-                    user_id=assignee.id,
-                    new_status=update_data['status'],
-                    changer_id=current_user.id,
-                    db=db
-                )
+    if 'status' in update_data:
+        notification_queue.stage(
+            'task_status_changed', task.id,
+            [uid for uid in new_assignee_ids if uid != str(current_user.id)],
+            current_user.id, db, new_status=update_data['status']
+        )
 
-    await broadcast_task_update(task)
+    await _count_status_change(task, db)
+    changed = _changed_fields(task)
+    await db.commit()
+    _invalidate_task_counts(task, *(original_assignee_ids | new_assignee_ids))
+    await notification_queue.dispatch(db)
+    task = await _load_task(task.id, db)
+    # Users just unassigned get this update too, so they learn they were removed
+    await broadcast_task_update(task, changed, original_assignee_ids | new_assignee_ids)
     return task
 
-async def delete_task(task_id: str, current_user: schemas.User, db: Session = Depends(get_db)):
+async def delete_task(task_id: str, current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
     task = await get_task_by_id(task_id, current_user, db)
     is_personal_task = task.project_id is None
     if is_personal_task:
         if str(task.owner_id) != str(current_user.id):
             raise HTTPException(status_code=403, detail="Only the task owner can delete this personal task.")
     else:
-        if not task.project or str(task.project.owner_id) != str(current_user.id):
+        if not await _can_manage_task(task, current_user, db):
             raise HTTPException(status_code=403, detail="Only the project owner can delete this task.")
 
     project_id = str(task.project_id)
-    db.delete(task)
-    db.commit()
-    await broadcast_task_deletion(task_id, project_id)
+    assignee_ids = task.assignee_ids
+    await db.delete(task)
+    await adjust_task_counts(task.project_id, task.status, None, db)
+    await db.commit()
+    _invalidate_task_counts(task, *assignee_ids)
+    await broadcast_task_deletion(task_id, project_id, assignee_ids)
     return {"message": "Task deleted successfully."}
 
-async def save_task_content(task_id: str, task_submit: schemas.TaskSubmit, current_user: schemas.User, db: Session = Depends(get_db)):
+async def save_task_content(task_id: str, task_submit: schemas.TaskSubmit, current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
     task = await get_task_by_id(task_id, current_user, db)
     if str(current_user.id) not in [str(a.id) for a in task.assignees]:
         raise HTTPException(status_code=403, detail="You are not assigned to this task.")
 
-    new_entry = schemas.SubmissionEntry(
-        user_id=str(current_user.id),
-        username=current_user.full_name,
-        content=task_submit.content
-    )
-    
-    submission_list = list(task.submission_content or [])
-    updated_list = [entry for entry in submission_list if entry['user_id'] != str(current_user.id)]
-    updated_list.append(jsonable_encoder(new_entry))
-    
-    task.submission_content = updated_list
-    db.commit()
-    db.refresh(task)
-    await broadcast_task_update(task)
+    # One row per (task, assignee): saving replaces only the caller's row, so assignees saving at once do not overwrite each other
+    values = {
+        "task_id": task.id,
+        "user_id": str(current_user.id),
+        "username": current_user.full_name,
+        "content": task_submit.content,
+        "timestamp": schemas.utcnow(),
+    }
+    insert = postgresql_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    stmt = insert(schemas.TaskSubmission).values(**values)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[schemas.TaskSubmission.task_id, schemas.TaskSubmission.user_id],
+        set_={"username": stmt.excluded.username, "content": stmt.excluded.content, "submitted_at": stmt.excluded.submitted_at},
+    ))
+    await db.commit()
+    task = await _load_task(task.id, db)
+    await broadcast_task_update(task, {"submission_content"}, model=schemas.TaskResponse)
     return {"message": "Your submission has been saved."}
 
-async def submit_for_approval(task_id: str, current_user: schemas.User, db: Session = Depends(get_db)):
+async def submit_for_approval(task_id: str, current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
     task = await get_task_by_id(task_id, current_user, db)
     if task.project_id is None:
         raise HTTPException(status_code=400, detail="Personal tasks cannot be submitted for approval.")
-    if current_user not in task.assignees:
+    if str(current_user.id) not in task.assignee_ids:
         raise HTTPException(status_code=403, detail="You are not assigned to this task.")
 
     task.status = "pending_approval"
-    db.commit()
-    db.refresh(task)
 
     # Notify project owner
     if task.project and task.project.owner_id:
         if str(task.project.owner_id) != str(current_user.id):
-            await notification_service.create_task_submitted_for_approval_notification(
-                task_id=task.id,
-                user_id=task.project.owner_id,
-                submitter_id=current_user.id,
-                db=db
+            notification_queue.stage(
+                'task_submitted_for_approval', task.id, [task.project.owner_id], current_user.id, db
             )
 
-    await broadcast_task_update(task)
+    await _count_status_change(task, db)
+    changed = _changed_fields(task)
+    await db.commit()
+    _invalidate_task_counts(task, *task.assignee_ids)
+    await notification_queue.dispatch(db)
+    task = await _load_task(task.id, db)
+    await broadcast_task_update(task, changed)
     return {"message": "Task submitted for approval."}
 
-async def recall_task_submission(task_id: str, current_user: schemas.User, db: Session = Depends(get_db)):
+async def recall_task_submission(task_id: str, current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
     task = await get_task_by_id(task_id, current_user, db)
-    if current_user not in task.assignees:
+    if str(current_user.id) not in task.assignee_ids:
         raise HTTPException(status_code=403, detail="You are not assigned to this task.")
     if task.status != "pending_approval":
         raise HTTPException(status_code=400, detail="This task is not pending approval.")
 
     task.status = "in_progress"
-    db.commit()
-    db.refresh(task)
-    await broadcast_task_update(task)
+    await _count_status_change(task, db)
+    changed = _changed_fields(task)
+    await db.commit()
+    _invalidate_task_counts(task, *task.assignee_ids)
+    task = await _load_task(task.id, db)
+    await broadcast_task_update(task, changed)
     return {"message": "Task submission recalled successfully."}
 
-async def approve_task(task_id: str, current_user: schemas.User, db: Session = Depends(get_db)):
+async def approve_task(task_id: str, current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
     task = await get_task_by_id(task_id, current_user, db)
-    if not task.project or str(task.project.owner_id) != str(current_user.id):
+    if task.project_id is None or not await _can_manage_task(task, current_user, db):
         raise HTTPException(status_code=403, detail="Only the project owner can approve tasks.")
     if task.status != "pending_approval":
         raise HTTPException(status_code=400, detail="This task is not pending approval.")
 
     task.status = "completed"
-    task.completed_at = datetime.now(timezone.utc)
-    db.commit()
-    db.refresh(task)
+    task.completed_at = schemas.utcnow()
 
     # Notify assignees that the task has been approved
-    if task.assignees:
-        for assignee in task.assignees:
-            await notification_service.create_task_approved_notification(
-                task_id=task.id,
-                user_id=assignee.id,
-                approver_id=current_user.id,
-                db=db
-            )
+    notification_queue.stage(
+        'task_approved', task.id, task.assignee_ids, current_user.id, db
+    )
 
-    await broadcast_task_update(task)
+    await _count_status_change(task, db)
+    changed = _changed_fields(task)
+    await db.commit()
+    _invalidate_task_counts(task, *task.assignee_ids)
+    await notification_queue.dispatch(db)
+    task = await _load_task(task.id, db)
+    await broadcast_task_update(task, changed)
     return {"message": "Task approved successfully."}
 
-async def get_pending_approval_tasks(project_id: str, current_user: schemas.User, db: Session = Depends(get_db), page: int = 1, per_page: int = 20):
-    project = db.query(schemas.Project).filter(schemas.Project.id == project_id).first()
-    if not project or str(project.owner_id) != str(current_user.id):
-        raise HTTPException(status_code=403, detail="Only the project owner can view pending approval tasks.")
+async def get_pending_approval_tasks(project_id: str, current_user: schemas.User, db: AsyncSession = Depends(get_async_db), page: int = 1, per_page: int = 20, cursor: Optional[str] = None, with_total: bool = True, count: CountMode = "exact", fields: Optional[str] = None):
+    fields = parse_fields(fields)
+    await require_project(db, current_user, project_id, Permission.MANAGE_TASKS, "Only the project owner can view pending approval tasks.")
 
-    query = db.query(schemas.Task).filter(schemas.Task.project_id == project_id, schemas.Task.status == "pending_approval")
-    total_count = query.count()
-    tasks = query.order_by(schemas.Task.created_at.desc()).offset((page - 1) * per_page).limit(per_page).all()
-    return schemas.PaginatedTaskSummaryResponse(tasks=tasks, total_count=total_count)
+    query = pending_approval_query(project_id, fields)
+    return await _paginate_tasks(query, db, page, per_page, cursor, with_total, count, ("pending_approval", project_id), (f"project:{project_id}",), fields)
 
-async def complete_personal_task(task_id: str, current_user: schemas.User, db: Session = Depends(get_db)):
+async def complete_personal_task(task_id: str, current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
     task = await get_task_by_id(task_id, current_user, db)
     if str(task.owner_id) != str(current_user.id):
         raise HTTPException(status_code=403, detail="You are not the owner of this task.")
     
     task.status = "completed"
-    task.completed_at = datetime.now(timezone.utc)
-    db.commit()
-    db.refresh(task)
+    task.completed_at = schemas.utcnow()
+    await _count_status_change(task, db)
+    await db.commit()
+    _invalidate_task_counts(task, *task.assignee_ids)
+    task = await _load_task(task.id, db)
     return task
 
-async def reopen_task(task_id: str, current_user: schemas.User, db: Session = Depends(get_db)):
+async def reopen_task(task_id: str, current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
     task = await get_task_by_id(task_id, current_user, db)
-    is_personal_task = task.project_id is None
-    is_project_owner = not is_personal_task and task.project and str(task.project.owner_id) == str(current_user.id)
-    is_task_owner = is_personal_task and str(task.owner_id) == str(current_user.id)
-
-    if not is_project_owner and not is_task_owner:
+    if not await _can_manage_task(task, current_user, db):
         raise HTTPException(status_code=403, detail="You do not have permission to reopen this task.")
 
     task.status = "in_progress"
     task.completed_at = None
-    db.commit()
-    db.refresh(task)
 
     # Notify assignees that the task has been reopened
-    if task.assignees:
-        for assignee in task.assignees:
-            if str(assignee.id) != str(current_user.id):
-                await notification_service.create_task_reopened_notification(
-                    task_id=task.id,
-                    user_id=assignee.id,
-                    reopener_id=current_user.id,
-                    db=db
-                )
+    notification_queue.stage(
+        'task_reopened', task.id,
+        [uid for uid in task.assignee_ids if uid != str(current_user.id)],
+        current_user.id, db
+    )
 
-    await broadcast_task_update(task)
+    await _count_status_change(task, db)
+    changed = _changed_fields(task)
+    await db.commit()
+    _invalidate_task_counts(task, *task.assignee_ids)
+    await notification_queue.dispatch(db)
+    task = await _load_task(task.id, db)
+    await broadcast_task_update(task, changed)
     return task
 
-async def request_changes(task_id: str, current_user: schemas.User, db: Session = Depends(get_db)):
+async def request_changes(task_id: str, current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
     task = await get_task_by_id(task_id, current_user, db)
-    if not task.project or str(task.project.owner_id) != str(current_user.id):
+    if task.project_id is None or not await _can_manage_task(task, current_user, db):
         raise HTTPException(status_code=403, detail="Only the project owner can request changes.")
     if task.status != "pending_approval":
         raise HTTPException(status_code=400, detail="This task is not pending approval.")
 
     task.status = "in_progress"
-    db.commit()
-    db.refresh(task)
 
     # Notify assignees that changes are requested
-    if task.assignees:
-        for assignee in task.assignees:
-            await notification_service.create_task_changes_requested_notification(
-                task_id=task.id,
-                user_id=assignee.id,
-                requester_id=current_user.id,
-                db=db
-            )
+    notification_queue.stage(
+        'task_changes_requested', task.id, task.assignee_ids, current_user.id, db
+    )
 
-    await broadcast_task_update(task)
+    await _count_status_change(task, db)
+    changed = _changed_fields(task)
+    await db.commit()
+    _invalidate_task_counts(task, *task.assignee_ids)
+    await notification_queue.dispatch(db)
+    task = await _load_task(task.id, db)
+    await broadcast_task_update(task, changed)
     return {"message": "Changes requested for task."}
\ No newline at end of file
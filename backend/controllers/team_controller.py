@@ -1,23 +1,34 @@
 from fastapi import HTTPException, Depends
-from typing import List
-from datetime import datetime, timezone
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, func, insert, or_, select
+from sqlalchemy.orm import selectinload
 import logging
 
 from models import schemas
-from models.database import get_db
-from services import notification_service
+from models.database import get_async_db
+from services.notification_queue import notification_queue
+from services.pagination import keyset_page, next_cursor
+from services.permissions import Permission, permission_resolver, require_team, team_member_exists
+from services.user_search import user_search
 
-async def create_team(team_data: schemas.TeamCreate, current_user: schemas.User, db: Session = Depends(get_db)):
+TEAM_ACCESS_DENIED = "Access denied: You do not have permission to access this team."
+
+async def _get_team(team_id: str, db: AsyncSession):
+    result = await db.execute(select(schemas.Team).options(selectinload(schemas.Team.members)).filter(schemas.Team.id == team_id).execution_options(populate_existing=True))
+    return result.scalars().first()
+
+async def create_team(team_data: schemas.TeamCreate, current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
     try:
-        existing_team = db.query(schemas.Team).filter(schemas.Team.name == team_data.name, schemas.Team.owner_id == current_user.id).first()
+        result = await db.execute(select(schemas.Team).filter(schemas.Team.name == team_data.name, schemas.Team.owner_id == current_user.id))
+        existing_team = result.scalars().first()
         if existing_team:
             raise HTTPException(status_code=400, detail="A team with this name already exists.")
 
         member_ids = set(team_data.members)
         member_ids.add(current_user.id)
-        members = db.query(schemas.User).filter(schemas.User.id.in_(member_ids)).all()
+        result = await db.execute(select(schemas.User).filter(schemas.User.id.in_(member_ids)))
+        members = result.scalars().all()
 
         new_team = schemas.Team(
             name=team_data.name,
@@ -27,138 +38,119 @@ async def create_team(team_data: schemas.TeamCreate, current_user: schemas.User,
         )
         
         db.add(new_team)
-        db.commit()
-        db.refresh(new_team)
-        return new_team
+        await db.commit()
+        return await _get_team(new_team.id, db)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logging.error(f"Error creating team: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error while creating team: {e}")
 
-async def get_user_teams(current_user: schemas.User, db: Session = Depends(get_db)):
-    return db.query(schemas.Team).filter(or_(
+async def get_user_teams(current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(select(schemas.Team).options(selectinload(schemas.Team.members)).filter(or_(
         schemas.Team.owner_id == current_user.id,
         schemas.Team.members.any(id=current_user.id)
-    )).all()
-
-async def get_team_by_id(team_id: str, current_user: schemas.User, db: Session = Depends(get_db)):
-    team = db.query(schemas.Team).filter(schemas.Team.id == team_id).first()
-    if not team:
-        raise HTTPException(status_code=404, detail="Team not found.")
-
-    member_ids = [member.id for member in team.members]
-    if current_user.id not in member_ids and team.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Access denied: You do not have permission to access this team.")
-    
-    return team
+    )))
+    return result.scalars().all()
 
-async def update_team(team_id: str, team_update: schemas.TeamUpdate, current_user: schemas.User, db: Session = Depends(get_db)):
-    team = db.query(schemas.Team).filter(schemas.Team.id == team_id).first()
-    if not team:
-        raise HTTPException(status_code=404, detail="Team not found.")
-    
-    if team.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Only the team owner can update the team.")
+async def get_team_by_id(team_id: str, current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
+    # Check access first so a caller who is turned away never loads the member list
+    await require_team(db, current_user, team_id, Permission.READ, TEAM_ACCESS_DENIED)
+    return await _get_team(team_id, db)
 
+async def update_team(team_id: str, team_update: schemas.TeamUpdate, current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
     update_data = team_update.dict(exclude_unset=True)
+    required = Permission.EDIT | Permission.MANAGE_MEMBERS if "members" in update_data else Permission.EDIT
+    await require_team(db, current_user, team_id, required, "Only the team owner can update the team.")
+    team = await _get_team(team_id, db)
+
     for key, value in update_data.items():
         if key == "members":
-            member_users = db.query(schemas.User).filter(schemas.User.id.in_(value)).all()
-            setattr(team, key, member_users)
+            result = await db.execute(select(schemas.User).filter(schemas.User.id.in_(value)))
+            setattr(team, key, result.scalars().all())
         else:
             setattr(team, key, value)
     
-    team.updated_at = datetime.now(timezone.utc)
-    db.commit()
-    db.refresh(team)
-    return team
-
-async def delete_team(team_id: str, current_user: schemas.User, db: Session = Depends(get_db)):
-    team = db.query(schemas.Team).filter(schemas.Team.id == team_id).first()
-    if not team:
-        raise HTTPException(status_code=404, detail="Team not found.")
-    
-    if team.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Only the team owner can delete the team.")
-
-    db.delete(team)
-    db.commit()
+    team.updated_at = schemas.utcnow()
+    await db.commit()
+    permission_resolver.invalidate_team(team_id)
+    return await _get_team(team_id, db)
+
+async def delete_team(team_id: str, current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
+    await require_team(db, current_user, team_id, Permission.DELETE, "Only the team owner can delete the team.")
+    team = await _get_team(team_id, db)
+
+    await db.delete(team)
+    await db.commit()
+    permission_resolver.invalidate_team(team_id)
     return {"message": "Team deleted successfully."}
 
-async def get_team_members(team_id: str, current_user: schemas.User, db: Session = Depends(get_db), page: int = 1, per_page: int = 20):
-    team = await get_team_by_id(team_id, current_user, db)
-    all_members = team.members
-    start = (page - 1) * per_page
-    end = start + per_page
-    paginated_members = all_members[start:end]
-    return schemas.PaginatedUserResponse(users=paginated_members, total_count=len(all_members))
+async def get_team_members(team_id: str, current_user: schemas.User, db: AsyncSession = Depends(get_async_db), page: int = 1, per_page: int = 20, cursor: Optional[str] = None, with_total: bool = True):
+    await require_team(db, current_user, team_id, Permission.READ, TEAM_ACCESS_DENIED)
+    team_members = schemas.team_member_association
+
+    total_count = None
+    if with_total:
+        total_count = (await db.execute(select(func.count()).select_from(team_members).filter(team_members.c.team_id == team_id))).scalar_one()
 
-async def add_team_member(team_id: str, member_data: schemas.AddMemberRequest, current_user: schemas.User, db: Session = Depends(get_db)):
-    team = db.query(schemas.Team).filter(schemas.Team.id == team_id).first()
-    if not team:
-        raise HTTPException(status_code=404, detail="Team not found.")
+    # Keyed on user_id, which the (team_id, user_id) primary key already orders
+    query = select(schemas.User).join(team_members, team_members.c.user_id == schemas.User.id).filter(team_members.c.team_id == team_id)
+    result = await db.execute(keyset_page(query, [team_members.c.user_id], cursor, page, per_page, descending=False))
+    members = list(result.scalars().all())
+    cursor = next_cursor(members, per_page, lambda member: (member.id,))
+    return schemas.PaginatedUserResponse(users=members, total_count=total_count, next_cursor=cursor)
 
-    if team.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Only the team owner can add members.")
+async def add_team_member(team_id: str, member_data: schemas.AddMemberRequest, current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
+    await require_team(db, current_user, team_id, Permission.MANAGE_MEMBERS, "Only the team owner can add members.")
 
-    member_to_add = db.query(schemas.User).filter(schemas.User.id == member_data.userId).first()
+    member_to_add = await db.get(schemas.User, member_data.userId)
     if not member_to_add:
         raise HTTPException(status_code=404, detail="User not found.")
 
-    if member_to_add in team.members:
+    if (await db.execute(select(team_member_exists(team_id, member_data.userId)))).scalar():
         raise HTTPException(status_code=400, detail="User is already a member of this team.")
 
-    team.members.append(member_to_add)
-    db.commit()
-    db.refresh(team)
+    await db.execute(insert(schemas.team_member_association).values(team_id=team_id, user_id=member_data.userId))
 
     # Create a notification for the added member
-    await notification_service.create_team_invitation_notification(
-        team_id=team_id,
-        invited_user_id=member_data.userId,
-        inviter_user_id=current_user.id,
-        db=db
+    notification_queue.stage(
+        'team_invitation', team_id, [member_data.userId], current_user.id, db
     )
 
-    return team
+    await db.commit()
+    permission_resolver.invalidate_team(team_id)
+    await notification_queue.dispatch(db)
 
-async def search_team_members(team_id: str, query: str, current_user: schemas.User, db: Session = Depends(get_db)):
-    team = await get_team_by_id(team_id, current_user, db)
-    
-    member_ids = [m.id for m in team.members]
-    users = db.query(schemas.User).filter(
-        schemas.User.id.in_(member_ids),
-        schemas.User.username.ilike(f"%{query}%")
-    ).all()
-    return users
-
-async def remove_team_member(team_id: str, user_id: str, current_user: schemas.User, db: Session = Depends(get_db)):
-    team = db.query(schemas.Team).filter(schemas.Team.id == team_id).first()
-    if not team:
-        raise HTTPException(status_code=404, detail="Team not found.")
-
-    if team.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Only the team owner can remove members.")
-
-    if user_id == str(team.owner_id):
+    return await _get_team(team_id, db)
+
+async def search_team_members(team_id: str, query: str, limit: int, cursor: Optional[str], current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
+    await require_team(db, current_user, team_id, Permission.READ, TEAM_ACCESS_DENIED)
+    return await user_search.search(db, query, limit, cursor, scope=f"team:{team_id}", team_id=team_id)
+
+async def remove_team_member(team_id: str, user_id: str, current_user: schemas.User, db: AsyncSession = Depends(get_async_db)):
+    access = await require_team(db, current_user, team_id, Permission.MANAGE_MEMBERS, "Only the team owner can remove members.")
+
+    if user_id == access.owner_id:
         raise HTTPException(status_code=400, detail="The team owner cannot be removed.")
 
-    member_to_remove = db.query(schemas.User).filter(schemas.User.id == user_id).first()
+    member_to_remove = await db.get(schemas.User, user_id)
     if not member_to_remove:
         raise HTTPException(status_code=404, detail="User not found.")
 
-    if member_to_remove not in team.members:
+    if not (await db.execute(select(team_member_exists(team_id, user_id)))).scalar():
         raise HTTPException(status_code=400, detail="User is not a member of this team.")
 
-    team.members.remove(member_to_remove)
-    db.commit()
+    await db.execute(delete(schemas.team_member_association).where(
+        schemas.team_member_association.c.team_id == team_id,
+        schemas.team_member_association.c.user_id == user_id,
+    ))
 
     # Create a notification for the removed member
-    await notification_service.create_remove_from_team_notification(
-        team_id=team_id,
-        removed_user_id=user_id,
-        remover_user_id=current_user.id,
-        db=db
+    notification_queue.stage(
+        'remove_from_team', team_id, [user_id], current_user.id, db
     )
 
+    await db.commit()
+    permission_resolver.invalidate_team(team_id)
+    await notification_queue.dispatch(db)
+
     return {"message": "Member removed successfully."}
@@ -4,6 +4,8 @@ import logging
 
 from models import schemas
 from models.database import get_db
+from services.user_cache import user_cache
+from services.user_search import user_search
 
 async def update_user_info(user_update: schemas.UserUpdate, current_user: schemas.User, db: Session = Depends(get_db)):
     try:
@@ -20,6 +22,8 @@ async def update_user_info(user_update: schemas.UserUpdate, current_user: schema
         
         db.commit()
         db.refresh(user_in_db)
+        user_cache.invalidate(user_in_db.id)
+        user_search.invalidate()
         return user_in_db
 
     except Exception as e:
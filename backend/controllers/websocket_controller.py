@@ -0,0 +1,159 @@
+from fastapi import WebSocket, WebSocketDisconnect, status
+from typing import Optional
+import json
+import logging
+import time
+import jwt
+
+from config import settings
+from models.database import AsyncSessionLocal
+from middleware.auth import decode_access_token
+from services import notification_service
+from services.permissions import Permission, permission_resolver
+from websocket_manager import ConnectionManager, manager, notification_manager, project_channel, TASK_EVENTS
+
+class TokenBucket:
+    """Allows `rate` messages per second on average, with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+def _authenticate(websocket: WebSocket) -> Optional[str]:
+    # Browsers cannot set headers on a WebSocket handshake, so the JWT comes as ?token=
+    try:
+        return decode_access_token(websocket.query_params.get("token", "")).get("sub")
+    except jwt.InvalidTokenError:
+        return None
+
+def _reply(connections: ConnectionManager, websocket: WebSocket, message_type: str, **data):
+    connections.send(websocket, json.dumps({"type": message_type, "data": data}))
+
+async def _receive_messages(connections: ConnectionManager, websocket: WebSocket, user_id: str):
+    """Yield inbound JSON objects, closing the socket when the client exceeds its rate limit."""
+    bucket = TokenBucket(settings.WS_INBOUND_RATE, settings.WS_INBOUND_BURST)
+    while True:
+        raw = await websocket.receive_text()
+        connections.touch(websocket)
+        if not bucket.take():
+            logging.warning(f"Closing WebSocket for user {user_id}: inbound rate limit exceeded.")
+            connections.disconnect(websocket)
+            await connections.close(websocket, status.WS_1008_POLICY_VIOLATION)
+            return
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            message = None
+        if not isinstance(message, dict):
+            _reply(connections, websocket, "error", detail="Messages must be JSON objects.")
+            continue
+        yield message
+
+async def _subscribe(websocket: WebSocket, user_id: str, message: dict):
+    project_id = message.get("project_id")
+    events = message.get("events") or list(TASK_EVENTS)
+    if not isinstance(project_id, str) or not isinstance(events, list) or not set(events) <= set(TASK_EVENTS):
+        _reply(manager, websocket, "error", detail=f"subscribe needs a project_id and optional events from {list(TASK_EVENTS)}.")
+        return
+
+    async with AsyncSessionLocal() as db:
+        access = await permission_resolver.project(db, user_id, project_id)
+    if access is None:
+        _reply(manager, websocket, "error", detail="Project not found.", project_id=project_id)
+        return
+
+    # Same visibility as get_project_tasks: the "*" feed carries every task, anyone else gets the tasks assigned to them
+    sees_all = access.can(Permission.VIEW_ALL_TASKS)
+    audience = "*" if sees_all else str(user_id)
+    current = {channel for channel in manager.subscriptions(websocket) if channel.startswith(f"{project_id}:")}
+    if len(manager.subscriptions(websocket) - current) + len(events) > settings.WS_MAX_SUBSCRIPTIONS:
+        _reply(manager, websocket, "error", detail="Too many subscriptions on this connection.", project_id=project_id)
+        return
+
+    # Subscribing again replaces the project's event set
+    for channel in current:
+        manager.unsubscribe(websocket, channel)
+    channels = [project_channel(project_id, event_type, audience) for event_type in dict.fromkeys(events)]
+    for channel in channels:
+        manager.subscribe(websocket, channel)
+
+    buffer = manager.replay_buffer(project_id)
+    _reply(manager, websocket, "subscribed", project_id=project_id, events=events, scope="all" if sees_all else "assigned", epoch=buffer.epoch, seq=buffer.seq)
+
+    # A reconnecting client passes the last seq (and epoch) it saw; replay what it missed, or have it refetch.
+    # Nothing awaits between subscribing and queueing the replay, so no live event slips in between.
+    since = message.get("since")
+    if since is not None:
+        missed = buffer.since(since, channels) if isinstance(since, int) and message.get("epoch") == buffer.epoch else None
+        if missed is None:
+            _reply(manager, websocket, "resync_required", project_id=project_id)
+        else:
+            for replayed in missed:
+                manager.send(websocket, replayed)
+
+def _unsubscribe(websocket: WebSocket, message: dict):
+    project_id = message.get("project_id")
+    for channel in manager.subscriptions(websocket):
+        if channel.startswith(f"{project_id}:"):
+            manager.unsubscribe(websocket, channel)
+    _reply(manager, websocket, "unsubscribed", project_id=project_id)
+
+async def project_socket(websocket: WebSocket):
+    """Task events for any number of projects over one socket.
+
+    Clients send {"action": "subscribe", "project_id": ..., "events": [...], "since": ..., "epoch": ...},
+    {"action": "unsubscribe", "project_id": ...} and {"action": "pong"} in answer
+    to the server's pings; nothing they send is relayed. Task events carry a
+    per-project "seq" to pass back as since after a reconnect.
+    """
+    user_id = _authenticate(websocket)
+    if not user_id:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await manager.connect(websocket)
+    try:
+        async for message in _receive_messages(manager, websocket, user_id):
+            action = message.get("action")
+            if action == "subscribe":
+                await _subscribe(websocket, user_id, message)
+            elif action == "unsubscribe":
+                _unsubscribe(websocket, message)
+            elif action == "pong":
+                pass
+            else:
+                _reply(manager, websocket, "error", detail=f"Unknown action: {action}.")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        manager.disconnect(websocket)
+
+async def notification_socket(websocket: WebSocket):
+    """The user's own notification channel, starting with the current unread count."""
+    user_id = _authenticate(websocket)
+    if not user_id:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await notification_manager.connect(websocket, user_id)
+    try:
+        async with AsyncSessionLocal() as db:
+            count = await notification_service.get_unread_count(user_id, db)
+        _reply(notification_manager, websocket, "unread_count", count=count)
+        async for _ in _receive_messages(notification_manager, websocket, user_id):
+            pass
+    except WebSocketDisconnect:
+        pass
+    finally:
+        notification_manager.disconnect(websocket)
@@ -1,17 +1,27 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
+import time
 import jwt
 from sqlalchemy.orm import Session
 
 from models.schemas import User
 from models.database import get_db
+from services.user_cache import user_cache
 from config import settings
 import logging
 
 # Security setup
 security = HTTPBearer()
 
+# Recently verified tokens, so each token pays for its HMAC check once instead of on every request
+DECODED_TOKEN_CACHE_SIZE = 4096
+_decoded_tokens: "OrderedDict[str, dict]" = OrderedDict()
+
+# request.state key under which get_current_payload leaves the decoded token for TokenRefreshMiddleware
+TOKEN_PAYLOAD_STATE_KEY = "token_payload"
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     if expires_delta:
@@ -22,14 +32,30 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-async def get_current_payload(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+def decode_access_token(token: str) -> dict:
+    payload = _decoded_tokens.get(token)
+    if payload is not None:
+        if payload.get("exp") is not None and payload["exp"] <= time.time():
+            _decoded_tokens.pop(token, None)
+            raise jwt.ExpiredSignatureError("Signature has expired")
+        _decoded_tokens.move_to_end(token)
+        return payload
+
+    payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.ALGORITHM])
+    _decoded_tokens[token] = payload
+    if len(_decoded_tokens) > DECODED_TOKEN_CACHE_SIZE:
+        _decoded_tokens.popitem(last=False)
+    return payload
+
+async def get_current_payload(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Token không hợp lệ hoặc đã hết hạn.",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(credentials.credentials, settings.JWT_SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = decode_access_token(credentials.credentials)
+        setattr(request.state, TOKEN_PAYLOAD_STATE_KEY, payload)
         return payload
     except (jwt.InvalidTokenError, jwt.ExpiredSignatureError):
         raise credentials_exception
@@ -39,12 +65,24 @@ async def get_current_user(payload: dict = Depends(get_current_payload), db: Ses
     if user_id is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token không hợp lệ.")
 
+    cached_user = user_cache.get(user_id)
+    if cached_user is not None:
+        return cached_user
+
     try:
         user = db.query(User).filter(User.id == user_id).first()
         if user is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Không tìm thấy người dùng.")
+        user_cache.set(user)
         return user
     except Exception as e:
         logging.error(f"Lỗi khi lấy người dùng từ DB: {e}")
         raise HTTPException(status_code=500, detail="Lỗi máy chủ nội bộ khi lấy thông tin người dùng.")
 
+
+async def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+    """get_current_user, limited to the accounts listed in ADMIN_EMAILS."""
+    admin_emails = {email.strip().lower() for email in settings.ADMIN_EMAILS.split(",") if email.strip()}
+    if current_user.email.lower() not in admin_emails:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required.")
+    return current_user
@@ -0,0 +1,47 @@
+import time
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config import settings
+from middleware.auth import TOKEN_PAYLOAD_STATE_KEY, create_access_token
+
+def refreshed_token(payload: Optional[dict]) -> Optional[str]:
+    """Return a new token once the current one has used up TOKEN_REFRESH_THRESHOLD of its lifetime."""
+    if not payload or not payload.get("sub") or payload.get("exp") is None:
+        return None
+    lifetime = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    remaining = payload["exp"] - time.time()
+    if remaining > lifetime * (1 - settings.TOKEN_REFRESH_THRESHOLD):
+        return None
+    return create_access_token(data={"sub": payload["sub"]})
+
+class TokenRefreshMiddleware:
+    """Sliding session refresh as a plain ASGI middleware.
+
+    Rather than decoding the Authorization header again, it reuses the payload
+    get_current_payload already verified for this request, so unauthenticated
+    routes cost nothing and authenticated ones decode their token only once.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        path = scope.get("path", "")
+        if scope["type"] != "http" or not path.startswith("/api/") or path == "/api/auth/login":
+            await self.app(scope, receive, send)
+            return
+
+        # Make sure the route and this middleware share the same request.state dict
+        state = scope.setdefault("state", {})
+
+        async def send_with_refresh(message: Message):
+            if message["type"] == "http.response.start" and 200 <= message["status"] < 300:
+                new_token = refreshed_token(state.get(TOKEN_PAYLOAD_STATE_KEY))
+                if new_token:
+                    MutableHeaders(scope=message).append("X-New-Token", new_token)
+            await send(message)
+
+        await self.app(scope, receive, send_with_refresh)
@@ -0,0 +1,42 @@
+"""Indexes for the hot listing predicates
+
+Tables are still created by Base.metadata.create_all on startup; this first
+revision only adds the indexes that create_all will not add to tables that
+already exist. IF NOT EXISTS keeps it safe on databases created after the
+indexes were declared in models.schemas. On PostgreSQL the indexes are built
+CONCURRENTLY so the hot tables stay writable during the upgrade.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_tasks_project_id_created_at', 'tasks', ['project_id', 'created_at']),
+    ('ix_tasks_project_id_status_created_at', 'tasks', ['project_id', 'status', 'created_at']),
+    ('ix_tasks_owner_id_created_at', 'tasks', ['owner_id', 'created_at']),
+    ('ix_tasks_owner_id_status_created_at', 'tasks', ['owner_id', 'status', 'created_at']),
+    ('ix_task_assignees_user_id', 'task_assignees', ['user_id']),
+    ('ix_notifications_user_id_created_at', 'notifications', ['user_id', 'created_at']),
+    ('ix_notifications_user_id_is_read_created_at', 'notifications', ['user_id', 'is_read', 'created_at']),
+    ('ix_projects_team_id', 'projects', ['team_id']),
+    ('ix_projects_owner_id_created_at', 'projects', ['owner_id', 'created_at']),
+    ('ix_project_member_roles_user_id', 'project_member_roles', ['user_id']),
+    ('ix_team_members_user_id', 'team_members', ['user_id']),
+]
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
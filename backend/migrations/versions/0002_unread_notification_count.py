@@ -0,0 +1,29 @@
+"""Denormalized unread notification counter on users
+
+Adds users.unread_notification_count (skipped when create_all already made it)
+and backfills it from the notifications table in one statement.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('users')}
+    if 'unread_notification_count' not in columns:
+        op.add_column('users', sa.Column('unread_notification_count', sa.Integer(), nullable=False, server_default='0'))
+    op.execute(
+        "UPDATE users SET unread_notification_count = ("
+        "SELECT COUNT(*) FROM notifications "
+        "WHERE notifications.user_id = users.id AND notifications.is_read = false)"
+    )
+
+def downgrade():
+    op.drop_column('users', 'unread_notification_count')
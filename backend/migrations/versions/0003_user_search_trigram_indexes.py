@@ -0,0 +1,42 @@
+"""Trigram indexes for user search
+
+Enables pg_trgm and adds GIN trigram indexes on users.username, full_name and
+email so the ILIKE '%q%' matches in services.user_search use an index instead
+of scanning users. They live only in this migration: create_all cannot build
+them before the extension exists. Other databases are left alone; the app uses
+its in-process prefix index there.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_users_username_trgm', 'username'),
+    ('ix_users_full_name_trgm', 'full_name'),
+    ('ix_users_email_trgm', 'email'),
+]
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        for name, column in INDEXES:
+            op.create_index(
+                name, 'users', [column], if_not_exists=True, postgresql_concurrently=True,
+                postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'},
+            )
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.drop_index(name, table_name='users', if_exists=True, postgresql_concurrently=True)
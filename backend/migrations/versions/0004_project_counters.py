@@ -0,0 +1,38 @@
+"""Denormalized member and task status counters on projects
+
+Adds projects.member_count and one task counter per status (skipped when
+create_all already made them) and backfills them from project_member_roles
+and tasks.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+STATUS_COLUMNS = {
+    'todo_task_count': 'todo',
+    'in_progress_task_count': 'in_progress',
+    'pending_approval_task_count': 'pending_approval',
+    'completed_task_count': 'completed',
+}
+
+def upgrade():
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('projects')}
+    for name in ['member_count', *STATUS_COLUMNS]:
+        if name not in columns:
+            op.add_column('projects', sa.Column(name, sa.Integer(), nullable=False, server_default='0'))
+    assignments = ["member_count = (SELECT COUNT(*) FROM project_member_roles WHERE project_member_roles.project_id = projects.id)"]
+    for name, status in STATUS_COLUMNS.items():
+        assignments.append(f"{name} = (SELECT COUNT(*) FROM tasks WHERE tasks.project_id = projects.id AND tasks.status = '{status}')")
+    op.execute("UPDATE projects SET " + ", ".join(assignments))
+
+def downgrade():
+    for name in reversed(['member_count', *STATUS_COLUMNS]):
+        op.drop_column('projects', name)
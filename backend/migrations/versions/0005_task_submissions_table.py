@@ -0,0 +1,104 @@
+"""Move task submissions from tasks.submission_content into task_submissions
+
+Creates task_submissions, keyed by (task_id, user_id) (skipped when create_all
+already made it), copies each task's JSON submissions into it in batches and
+drops the JSON column. When a user appears twice in one task's list, the last
+entry wins, matching what save_task_content used to keep.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+import json
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+tasks = sa.table('tasks', sa.column('id', sa.String), sa.column('submission_content', sa.JSON))
+task_submissions = sa.table(
+    'task_submissions',
+    sa.column('task_id', sa.String),
+    sa.column('user_id', sa.String),
+    sa.column('username', sa.String),
+    sa.column('content', sa.String),
+    sa.column('submitted_at', sa.DateTime),
+)
+
+def _timestamp(value):
+    """Naive UTC, like everything else written to the TIMESTAMP WITHOUT TIME ZONE columns."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    value = value or datetime.now(timezone.utc)
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if 'task_submissions' not in inspector.get_table_names():
+        op.create_table(
+            'task_submissions',
+            sa.Column('task_id', sa.String(), sa.ForeignKey('tasks.id', ondelete='CASCADE'), primary_key=True),
+            sa.Column('user_id', sa.String(), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+            sa.Column('username', sa.String(), nullable=False),
+            sa.Column('content', sa.String(), nullable=False),
+            sa.Column('submitted_at', sa.DateTime(), nullable=False),
+        )
+    if 'submission_content' not in {column['name'] for column in inspector.get_columns('tasks')}:
+        return
+
+    last_id = ''
+    while True:
+        rows = bind.execute(
+            sa.select(tasks.c.id, tasks.c.submission_content)
+            .where(tasks.c.id > last_id).order_by(tasks.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        submissions = {}
+        for task_id, content in rows:
+            if isinstance(content, str):
+                content = json.loads(content)
+            for entry in content or []:
+                submissions[(task_id, entry['user_id'])] = {
+                    'task_id': task_id,
+                    'user_id': entry['user_id'],
+                    'username': entry.get('username', ''),
+                    'content': entry.get('content', ''),
+                    'submitted_at': _timestamp(entry.get('timestamp')),
+                }
+        if submissions:
+            # Skip rows already saved through the new table by an app that was deployed first
+            existing = set(bind.execute(
+                sa.select(task_submissions.c.task_id, task_submissions.c.user_id)
+                .where(task_submissions.c.task_id.in_([row[0] for row in rows]))
+            ).all())
+            new = [row for key, row in submissions.items() if key not in existing]
+            if new:
+                bind.execute(task_submissions.insert(), new)
+        last_id = rows[-1][0]
+
+    op.drop_column('tasks', 'submission_content')
+
+def downgrade():
+    bind = op.get_bind()
+    op.add_column('tasks', sa.Column('submission_content', sa.JSON(), nullable=True))
+    rows = bind.execute(sa.select(task_submissions).order_by(task_submissions.c.task_id, task_submissions.c.submitted_at)).all()
+    content = {}
+    for row in rows:
+        content.setdefault(row.task_id, []).append({
+            'user_id': row.user_id,
+            'username': row.username,
+            'content': row.content,
+            'timestamp': row.submitted_at.isoformat(),
+        })
+    for task_id, entries in content.items():
+        bind.execute(tasks.update().where(tasks.c.id == task_id).values(submission_content=entries))
+    op.drop_table('task_submissions')
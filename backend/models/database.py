@@ -1,15 +1,49 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from config import settings
+from models.pool_metrics import InstrumentedAsyncAdaptedQueuePool, InstrumentedQueuePool
 
-engine = create_engine(settings.DATABASE_URL)
+def get_async_database_url(database_url: str) -> str:
+    """Map the sync DATABASE_URL onto the matching async driver."""
+    url = make_url(database_url)
+    if url.drivername in ("postgres", "postgresql", "postgresql+psycopg2"):
+        url = url.set(drivername="postgresql+asyncpg")
+        # asyncpg does not understand libpq's sslmode, it takes ssl instead
+        sslmode = url.query.get("sslmode")
+        if sslmode:
+            url = url.difference_update_query(["sslmode"]).update_query_dict({"ssl": sslmode})
+    elif url.drivername == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url.render_as_string(hide_password=False)
+
+pool_options = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
+
+engine = create_engine(settings.DATABASE_URL, poolclass=InstrumentedQueuePool, **pool_options)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Async engine used by the controllers that run on the event loop.
+# expire_on_commit is off so ORM objects stay readable after commit without
+# triggering implicit (and in asyncio, forbidden) lazy loads.
+async_engine = create_async_engine(get_async_database_url(settings.DATABASE_URL), poolclass=InstrumentedAsyncAdaptedQueuePool, **pool_options)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
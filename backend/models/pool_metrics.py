@@ -0,0 +1,74 @@
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from services.metrics import Histogram
+
+class PoolMetrics:
+    """Checkout wait times, overflow and timeout events for one connection pool."""
+
+    def __init__(self):
+        self.wait_time = Histogram()
+        self.checkouts = 0
+        self.overflow_events = 0
+        self.timeouts = 0
+        self._lock = threading.Lock()
+
+    def record_checkout(self, waited: float, overflowed: bool):
+        self.wait_time.observe(waited)
+        with self._lock:
+            self.checkouts += 1
+            if overflowed:
+                self.overflow_events += 1
+
+    def record_timeout(self, waited: float):
+        self.wait_time.observe(waited)
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "overflow_events": self.overflow_events,
+            "timeouts": self.timeouts,
+            "wait_time_seconds": self.wait_time.snapshot(),
+        }
+
+class _InstrumentedPoolMixin:
+    # Kept on the class so the counters survive engine.dispose(), which swaps in a recreated pool
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        overflow_before = self._overflow
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_timeout(time.perf_counter() - start)
+            raise
+        overflowed = self._overflow > overflow_before and self._overflow > 0
+        self.metrics.record_checkout(time.perf_counter() - start, overflowed)
+        return connection
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    metrics = PoolMetrics()
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    metrics = PoolMetrics()
+
+def pool_status(pool) -> dict:
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+        })
+    if isinstance(pool, _InstrumentedPoolMixin):
+        status.update(pool.metrics.snapshot())
+    return status
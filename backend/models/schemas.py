@@ -1,19 +1,30 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, field_validator, validator
 from typing import List, Optional, Literal, Any
 import uuid
 from datetime import datetime, timezone
 
 # SQLAlchemy specific imports
-from sqlalchemy import (Column, String, DateTime, Boolean, ForeignKey, Table, JSON, ARRAY)
+from sqlalchemy import (Column, String, DateTime, Boolean, Integer, ForeignKey, Table, JSON, ARRAY, Index)
 from sqlalchemy.orm import relationship
 from .database import Base
 
+def utcnow() -> datetime:
+    """Current UTC time without tzinfo: the DateTime columns are TIMESTAMP WITHOUT TIME ZONE and asyncpg rejects aware values for them."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Convert an aware datetime (e.g. a client's "...Z" deadline) to naive UTC; naive values are taken as UTC already."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
 # Association Table for Team Members (Many-to-Many)
 team_member_association = Table(
     'team_members',
     Base.metadata,
     Column('team_id', String, ForeignKey('teams.id'), primary_key=True),
-    Column('user_id', String, ForeignKey('users.id'), primary_key=True)
+    Column('user_id', String, ForeignKey('users.id'), primary_key=True),
+    Index('ix_team_members_user_id', 'user_id')
 )
 
 # Association Table for Task Assignees (Many-to-Many)
@@ -21,7 +32,8 @@ task_assignee_association = Table(
     'task_assignees',
     Base.metadata,
     Column('task_id', String, ForeignKey('tasks.id'), primary_key=True),
-    Column('user_id', String, ForeignKey('users.id'), primary_key=True)
+    Column('user_id', String, ForeignKey('users.id'), primary_key=True),
+    Index('ix_task_assignees_user_id', 'user_id')
 )
 
 # --- SQLAlchemy ORM Models ---
@@ -34,7 +46,9 @@ class User(Base):
     full_name = Column(String, nullable=False)
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utcnow)
+    # Maintained by notification_service so the unread badge poll is a primary key lookup
+    unread_notification_count = Column(Integer, nullable=False, default=0, server_default='0')
 
     teams = relationship("Team", secondary=team_member_association, back_populates="members")
     owned_teams = relationship("Team", back_populates="owner")
@@ -46,8 +60,8 @@ class Team(Base):
     name = Column(String, nullable=False)
     description = Column(String)
     owner_id = Column(String, ForeignKey('users.id'), nullable=False)
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
 
     owner = relationship("User", back_populates="owned_teams")
     members = relationship("User", secondary=team_member_association, back_populates="teams")
@@ -55,13 +69,23 @@ class Team(Base):
 
 class Project(Base):
     __tablename__ = 'projects'
+    __table_args__ = (
+        Index('ix_projects_team_id', 'team_id'),
+        Index('ix_projects_owner_id_created_at', 'owner_id', 'created_at'),
+    )
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String, nullable=False)
     description = Column(String)
     owner_id = Column(String, ForeignKey('users.id'), nullable=False)
     team_id = Column(String, ForeignKey('teams.id'), nullable=True)
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
+    # Maintained by services.project_counters so project listings need no GROUP BY over members or tasks
+    member_count = Column(Integer, nullable=False, default=0, server_default='0')
+    todo_task_count = Column(Integer, nullable=False, default=0, server_default='0')
+    in_progress_task_count = Column(Integer, nullable=False, default=0, server_default='0')
+    pending_approval_task_count = Column(Integer, nullable=False, default=0, server_default='0')
+    completed_task_count = Column(Integer, nullable=False, default=0, server_default='0')
 
     owner = relationship("User", back_populates="owned_projects")
     team = relationship("Team", back_populates="projects")
@@ -70,6 +94,9 @@ class Project(Base):
 
 class ProjectMemberRole(Base):
     __tablename__ = 'project_member_roles'
+    __table_args__ = (
+        Index('ix_project_member_roles_user_id', 'user_id'),
+    )
     project_id = Column(String, ForeignKey('projects.id', ondelete="CASCADE"), primary_key=True)
     user_id = Column(String, ForeignKey('users.id', ondelete="CASCADE"), primary_key=True)
     role = Column(String, nullable=False, default='Member')
@@ -79,6 +106,12 @@ class ProjectMemberRole(Base):
 
 class Task(Base):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        Index('ix_tasks_project_id_created_at', 'project_id', 'created_at'),
+        Index('ix_tasks_project_id_status_created_at', 'project_id', 'status', 'created_at'),
+        Index('ix_tasks_owner_id_created_at', 'owner_id', 'created_at'),
+        Index('ix_tasks_owner_id_status_created_at', 'owner_id', 'status', 'created_at'),
+    )
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     title = Column(String, nullable=False)
     description = Column(String)
@@ -88,8 +121,7 @@ class Task(Base):
     assigned_by = Column(String, ForeignKey('users.id'), nullable=True)
     status = Column(String, default="todo")
     priority = Column(String, default="medium")
-    submission_content = Column(JSON, default=[])
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utcnow)
     assigned_at = Column(DateTime, nullable=True)
     accepted_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
@@ -97,13 +129,32 @@ class Task(Base):
 
     project = relationship("Project", back_populates="tasks")
     assignees = relationship("User", secondary=task_assignee_association)
+    # Not loaded by the list queries; get_task_by_id and _load_task ask for it explicitly
+    submissions = relationship("TaskSubmission", order_by="TaskSubmission.timestamp", cascade="all, delete-orphan", passive_deletes=True, lazy="raise")
 
     @property
     def assignee_ids(self):
         return [str(user.id) for user in self.assignees]
 
+    @property
+    def submission_content(self):
+        return self.submissions
+
+class TaskSubmission(Base):
+    """Each assignee's latest submission for a task; saving again replaces the row."""
+    __tablename__ = 'task_submissions'
+    task_id = Column(String, ForeignKey('tasks.id', ondelete="CASCADE"), primary_key=True)
+    user_id = Column(String, ForeignKey('users.id', ondelete="CASCADE"), primary_key=True)
+    username = Column(String, nullable=False)
+    content = Column(String, nullable=False)
+    timestamp = Column('submitted_at', DateTime, nullable=False, default=utcnow)
+
 class Notification(Base):
     __tablename__ = 'notifications'
+    __table_args__ = (
+        Index('ix_notifications_user_id_created_at', 'user_id', 'created_at'),
+        Index('ix_notifications_user_id_is_read_created_at', 'user_id', 'is_read', 'created_at'),
+    )
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, ForeignKey('users.id'), nullable=False)
     title = Column(String, nullable=False)
@@ -111,17 +162,23 @@ class Notification(Base):
     type = Column(String, default="general")
     is_read = Column(Boolean, default=False)
     related_id = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utcnow)
 
     user = relationship("User")
 
+class NotificationOutbox(Base):
+    __tablename__ = 'notification_outbox'
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=utcnow)
+
 class Role(Base):
     __tablename__ = 'roles'
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String, unique=True, nullable=False)
     description = Column(String)
     permissions = Column(ARRAY(String), default=[])
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utcnow)
 
 
 # --- Pydantic Schemas (for API requests/responses) ---
@@ -149,7 +206,12 @@ class UserResponse(UserBase):
 
 class PaginatedUserResponse(BaseModel):
     users: List[UserResponse]
-    total_count: int
+    total_count: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+class UserSearchResponse(BaseModel):
+    users: List[UserResponse]
+    next_cursor: Optional[str] = None
 
 # Role Models
 class RoleBase(BaseModel):
@@ -187,10 +249,15 @@ class ProjectResponse(ProjectBase):
 
 class ProjectSummary(ProjectResponse):
     member_count: Optional[int] = None
+    todo_task_count: int = 0
+    in_progress_task_count: int = 0
+    pending_approval_task_count: int = 0
+    completed_task_count: int = 0
 
 class PaginatedProjectSummaryResponse(BaseModel):
     projects: List[ProjectSummary]
-    total_count: int
+    total_count: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 # Submission Models
 class SubmissionEntry(BaseModel):
@@ -199,6 +266,9 @@ class SubmissionEntry(BaseModel):
     content: str
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+    class Config:
+        from_attributes = True
+
 # Task Models
 class TaskBase(BaseModel):
     title: str
@@ -207,6 +277,8 @@ class TaskBase(BaseModel):
     priority: Literal["low", "medium", "high", "critical"] = "medium"
     deadline: Optional[datetime] = None
 
+    _deadline_utc = field_validator("deadline")(to_naive_utc)
+
 class TaskCreate(TaskBase):
     project_id: Optional[str] = None
     assignee_ids: List[str] = []
@@ -220,13 +292,15 @@ class TaskUpdate(BaseModel):
     priority: Optional[Literal["low", "medium", "high", "critical"]] = None
     deadline: Optional[datetime] = None
 
-class TaskResponse(TaskBase):
+    _deadline_utc = field_validator("deadline")(to_naive_utc)
+
+class TaskSummary(TaskBase):
+    """A task as the list endpoints return it, without the submissions."""
     id: str
     project_id: Optional[str] = None
     owner_id: Optional[str] = None
     assigned_by: Optional[str] = None
     status: Literal["todo", "in_progress", "pending_approval", "completed"] = "todo"
-    submission_content: List[SubmissionEntry] = Field(default_factory=list)
     created_at: datetime
     assigned_at: Optional[datetime] = None
     accepted_at: Optional[datetime] = None
@@ -237,12 +311,13 @@ class TaskResponse(TaskBase):
     class Config:
         from_attributes = True
 
-class TaskSummary(TaskResponse):
-    pass
+class TaskResponse(TaskSummary):
+    submission_content: List[SubmissionEntry] = Field(default_factory=list)
 
 class PaginatedTaskSummaryResponse(BaseModel):
     tasks: List[TaskSummary]
-    total_count: int
+    total_count: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 class TaskSubmit(BaseModel):
     content: str
@@ -292,7 +367,8 @@ class ProjectMemberUpdate(BaseModel):
 
 class PaginatedProjectMemberResponse(BaseModel):
     members: List[ProjectMember]
-    total_count: int
+    total_count: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 # Notification Models
 class NotificationBase(BaseModel):
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends
+
+from models import schemas
+from controllers import admin_controller
+from middleware.auth import get_current_admin
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+@router.get("/metrics/db-pool")
+async def get_db_pool_metrics_endpoint(current_user: schemas.User = Depends(get_current_admin)):
+    return await admin_controller.get_db_pool_metrics()
+
+@router.get("/metrics/user-cache")
+async def get_user_cache_metrics_endpoint(current_user: schemas.User = Depends(get_current_admin)):
+    return await admin_controller.get_user_cache_metrics()
+
+@router.get("/metrics/permissions")
+async def get_permission_cache_metrics_endpoint(current_user: schemas.User = Depends(get_current_admin)):
+    return await admin_controller.get_permission_cache_metrics()
+
+@router.get("/metrics/rate-limits")
+async def get_rate_limit_metrics_endpoint(current_user: schemas.User = Depends(get_current_admin)):
+    return await admin_controller.get_rate_limit_metrics()
+
+@router.get("/metrics/notification-queue")
+async def get_notification_queue_metrics_endpoint(current_user: schemas.User = Depends(get_current_admin)):
+    return await admin_controller.get_notification_queue_metrics()
+
+@router.get("/metrics/project-counters")
+async def get_project_counter_metrics_endpoint(current_user: schemas.User = Depends(get_current_admin)):
+    return await admin_controller.get_project_counter_metrics()
+
+@router.post("/repair/project-counters")
+async def repair_project_counters_endpoint(current_user: schemas.User = Depends(get_current_admin)):
+    return await admin_controller.repair_project_counters()
+
+@router.get("/metrics/websockets")
+async def get_websocket_metrics_endpoint(current_user: schemas.User = Depends(get_current_admin)):
+    return await admin_controller.get_websocket_metrics()
@@ -1,29 +1,30 @@
-from fastapi import APIRouter, Depends
-from typing import List
+from fastapi import APIRouter, Depends, Query, Request
+from typing import Optional
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from models import schemas
 from controllers import auth_controller
 from middleware.auth import get_current_user
-from models.database import get_db
+from models.database import get_db, get_async_db
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 @router.post("/register", response_model=schemas.UserResponse)
-async def register(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
-    return await auth_controller.register_user(user_data, db)
+async def register(user_data: schemas.UserCreate, request: Request, db: Session = Depends(get_db)):
+    return await auth_controller.register_user(user_data, request, db)
 
 @router.post("/login", response_model=schemas.Token)
-async def login(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
-    return await auth_controller.login_user(user_credentials, db)
+async def login(user_credentials: schemas.UserLogin, request: Request, db: Session = Depends(get_db)):
+    return await auth_controller.login_user(user_credentials, request, db)
 
 @router.get("/me", response_model=schemas.UserResponse)
 async def read_users_me(current_user: schemas.User = Depends(get_current_user)):
     return await auth_controller.get_current_user_info(current_user)
 
-@router.get("/users/search", response_model=List[schemas.UserResponse])
-async def search_users_endpoint(query: str, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_user)):
-    return await auth_controller.search_users(query, db, current_user)
+@router.get("/users/search", response_model=schemas.UserSearchResponse)
+async def search_users_endpoint(query: str, limit: int = Query(10, ge=1, le=50), cursor: Optional[str] = None, db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(get_current_user)):
+    return await auth_controller.search_users(query, limit, cursor, current_user, db)
 
 @router.get("/users/{user_id}", response_model=schemas.UserResponse)
 async def get_user_by_id_endpoint(user_id: str, db: Session = Depends(get_db)):
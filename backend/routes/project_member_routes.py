@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Depends
-from typing import List
-from sqlalchemy.orm import Session
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from models import schemas
 from controllers import project_member_controller
 from middleware.auth import get_current_user
-from models.database import get_db
+from models.database import get_async_db
 
 router = APIRouter()
 
@@ -14,10 +14,12 @@ async def get_project_members_route(
     project_id: str,
     page: int = 1,
     per_page: int = 20,
+    cursor: Optional[str] = None,
+    with_total: bool = True,
     current_user: schemas.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return await project_member_controller.get_project_members(project_id, current_user, db, page, per_page)
+    return await project_member_controller.get_project_members(project_id, current_user, db, page, per_page, cursor, with_total)
 
 @router.put("/projects/{project_id}/members/{user_id}/role")
 async def update_project_member_role_route(
@@ -25,6 +27,6 @@ async def update_project_member_role_route(
     user_id: str,
     role_update: schemas.ProjectMemberUpdate,
     current_user: schemas.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     return await project_member_controller.update_project_member_role(project_id, user_id, role_update, current_user, db)
\ No newline at end of file
@@ -1,19 +1,16 @@
-from fastapi import FastAPI, APIRouter, Depends, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, APIRouter, Depends, WebSocket
 from fastapi.responses import JSONResponse
 from starlette.middleware.cors import CORSMiddleware
 import logging
 from sqlalchemy.orm import Session
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-import jwt
-from datetime import timedelta
-from typing import Callable
 
 from config import settings
 from models import schemas
-from models.database import engine, get_db
-from websocket_manager import manager
-from middleware.auth import create_access_token
+from models.database import engine, async_engine, get_db
+from websocket_manager import pubsub, manager, notification_manager
+from services.notification_queue import notification_queue
+from services.project_counters import counter_repair_job
+from middleware.token_refresh import TokenRefreshMiddleware
 
 # Create all database tables
 schemas.Base.metadata.create_all(bind=engine)
@@ -27,9 +24,11 @@ from routes.task_routes import router as task_router
 from routes.notification_routes import router as notification_router
 from routes.user_routes import router as user_router
 from routes.project_member_routes import router as project_member_router
+from routes.admin_routes import router as admin_router
 
-# Import controllers for init endpoint
+# Import controllers for init and WebSocket endpoints
 from controllers.role_controller import initialize_default_roles
+from controllers import websocket_controller
 
 # Create the main app
 app = FastAPI(title="ProjectHub API - Modern Task Management")
@@ -52,31 +51,6 @@ app.add_middleware(
     expose_headers=["X-New-Token"],
 )
 
-class TokenRefreshMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable):
-        response = await call_next(request)
-        
-        # Only refresh for successful API requests that are not the login endpoint
-        if response.status_code >= 200 and response.status_code < 300 and request.url.path.startswith("/api/") and request.url.path != "/api/auth/login":
-            auth_header = request.headers.get('authorization')
-            if auth_header:
-                try:
-                    scheme, token = auth_header.split()
-                    if scheme.lower() == 'bearer':
-                        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.ALGORITHM])
-                        user_id = payload.get('sub')
-                        if user_id:
-                            new_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-                            new_token = create_access_token(
-                                data={"sub": user_id},
-                                expires_delta=new_token_expires
-                            )
-                            response.headers['X-New-Token'] = new_token
-                except (ValueError, jwt.PyJWTError):
-                    pass
-                
-        return response
-
 app.add_middleware(TokenRefreshMiddleware)
 
 # Create a router with the /api prefix
@@ -91,6 +65,7 @@ api_router.include_router(task_router)
 api_router.include_router(notification_router)
 api_router.include_router(user_router)
 api_router.include_router(project_member_router)
+api_router.include_router(admin_router)
 
 # Root endpoint
 @api_router.get("/")
@@ -102,18 +77,14 @@ async def root():
 async def initialize(db: Session = Depends(get_db)):
     return await initialize_default_roles(db)
 
-# WebSocket endpoint
-@api_router.websocket("/ws/{project_id}")
-async def websocket_endpoint(websocket: WebSocket, project_id: str):
-    await manager.connect(websocket, project_id)
-    try:
-        while True:
-            data = await websocket.receive_text()
-            # For now, we just broadcast any message received
-            await manager.broadcast(f"Client {project_id} says: {data}", project_id)
-    except WebSocketDisconnect:
-        manager.disconnect(websocket, project_id)
-        await manager.broadcast(f"Client {project_id} left the chat", project_id)
+# WebSocket endpoints; both take the access token as ?token=
+@api_router.websocket("/ws")
+async def websocket_endpoint(websocket: WebSocket):
+    await websocket_controller.project_socket(websocket)
+
+@api_router.websocket("/ws/notifications")
+async def notification_websocket_endpoint(websocket: WebSocket):
+    await websocket_controller.notification_socket(websocket)
 
 # Include the main API router
 app.include_router(api_router)
@@ -125,6 +96,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def startup():
+    await pubsub.start()
+    await manager.start()
+    await notification_manager.start()
+    await notification_queue.start()
+    counter_repair_job.start()
+
 @app.on_event("shutdown")
 async def shutdown():
-    pass
+    await notification_queue.drain(settings.NOTIFICATION_QUEUE_DRAIN_TIMEOUT)
+    await counter_repair_job.stop()
+    await manager.stop()
+    await notification_manager.stop()
+    await pubsub.stop()
+    await async_engine.dispose()
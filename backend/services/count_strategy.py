@@ -0,0 +1,107 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, Literal, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from config import settings
+
+# How a paginated listing computes total_count:
+#   exact     - COUNT(*) over the filtered query (the default)
+#   cached    - exact, but reused for COUNT_CACHE_TTL_SECONDS unless a task change invalidates it
+#   estimated - the planner's row estimate (PostgreSQL only; other databases fall back to exact)
+CountMode = Literal["exact", "cached", "estimated"]
+
+class _Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+class CountCache:
+    """Short-lived listing totals, invalidated by tag (e.g. "project:<id>", "user:<id>").
+
+    Holds at most max_size totals, dropping the least recently used one when full;
+    a key leaves its tag sets whenever it expires, is evicted or is invalidated.
+    """
+
+    def __init__(self, ttl: int, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Tuple[int, float, Tuple[str, ...]]]" = OrderedDict()
+        self._tags: Dict[str, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: Hashable, value: int, tags: Iterable[str]):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            tags = tuple(tags)
+            self._entries[key] = (value, time.monotonic() + self.ttl, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, *tags: str):
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._drop(key)
+
+    def _drop(self, key: Hashable):
+        """Remove key and its tag memberships; the caller holds the lock."""
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+count_cache = CountCache(settings.COUNT_CACHE_TTL_SECONDS, settings.COUNT_CACHE_MAX_SIZE)
+
+async def exact_count(query, db: AsyncSession) -> int:
+    return (await db.execute(select(func.count()).select_from(query.order_by(None).subquery()))).scalar_one()
+
+async def estimated_count(query, db: AsyncSession) -> int:
+    if db.bind.dialect.name != "postgresql":
+        return await exact_count(query, db)
+    plan = (await db.execute(_Explain(query.order_by(None)))).scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+async def resolve_total(query, db: AsyncSession, mode: CountMode, cache_key: Hashable = None, tags: Iterable[str] = ()) -> int:
+    if mode == "estimated":
+        return await estimated_count(query, db)
+    if mode == "cached" and cache_key is not None:
+        total = count_cache.get(cache_key)
+        if total is None:
+            total = await exact_count(query, db)
+            count_cache.set(cache_key, total, tags)
+        return total
+    return await exact_count(query, db)
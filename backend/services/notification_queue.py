@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models import schemas
+from models.database import AsyncSessionLocal
+from services import notification_service
+from services.metrics import Histogram
+
+# db.info key holding the events staged on a request's session until it commits
+STAGED_EVENTS_KEY = "staged_notification_events"
+
+@dataclass
+class NotificationEvent:
+    notification_type: str
+    related_id: str
+    user_ids: List[str]
+    actor_id: str
+    context: dict = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+    outbox_id: Optional[str] = None
+
+class NotificationQueue:
+    """Bounded in-process queue that writes notifications off the request path.
+
+    Controllers stage events on their session before committing and dispatch
+    them afterwards, so workers only ever see events for committed changes.
+    When the queue is full dispatch waits up to NOTIFICATION_QUEUE_PUT_TIMEOUT
+    and then writes the notifications inline, so a burst slows requests down
+    rather than dropping events. With NOTIFICATION_OUTBOX_ENABLED each staged
+    event is also written to notification_outbox in the caller's transaction
+    and replayed on startup if the process died before handling it.
+    """
+
+    def __init__(self, max_size: int, workers: int):
+        self.max_size = max_size
+        self.worker_count = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self.lag = Histogram()
+        self.processed = 0
+        self.failed = 0
+        self.inline_fallbacks = 0
+        self.recovered = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def stage(self, notification_type: str, related_id: str, user_ids, actor_id: str, db: AsyncSession, **context):
+        user_ids = [str(user_id) for user_id in user_ids]
+        if not user_ids:
+            return
+        event = NotificationEvent(notification_type, str(related_id), user_ids, str(actor_id), context)
+        if settings.NOTIFICATION_OUTBOX_ENABLED:
+            event.outbox_id = str(uuid.uuid4())
+            db.add(schemas.NotificationOutbox(id=event.outbox_id, payload=asdict(event)))
+        db.info.setdefault(STAGED_EVENTS_KEY, []).append(event)
+
+    async def dispatch(self, db: AsyncSession):
+        """Hand the session's staged events to the workers. Call after db.commit()."""
+        for event in db.info.pop(STAGED_EVENTS_KEY, []):
+            await self.enqueue(event)
+
+    async def enqueue(self, event: NotificationEvent):
+        if not self.running:
+            await self._process(event)
+            return
+        try:
+            await asyncio.wait_for(self._queue.put(event), timeout=settings.NOTIFICATION_QUEUE_PUT_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.inline_fallbacks += 1
+            logging.warning("Notification queue full, writing notifications inline.")
+            await self._process(event)
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+        if settings.NOTIFICATION_OUTBOX_ENABLED:
+            await self._recover_outbox()
+
+    async def drain(self, timeout: float):
+        """Stop taking new work, let the workers finish what is queued, then stop them."""
+        if not self.running:
+            return
+        workers, self._workers = self._workers, []
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logging.warning(f"Notification queue drain timed out with {self._queue.qsize()} events left.")
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _worker(self):
+        while True:
+            event = await self._queue.get()
+            try:
+                await self._process(event)
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, event: NotificationEvent):
+        try:
+            async with AsyncSessionLocal() as db:
+                if event.outbox_id:
+                    # Claim the outbox row by deleting it in the same transaction as the
+                    # notifications; if another worker or process got there first, skip
+                    result = await db.execute(delete(schemas.NotificationOutbox).filter(
+                        schemas.NotificationOutbox.id == event.outbox_id
+                    ))
+                    if result.rowcount == 0:
+                        return
+                rows = await notification_service.create_bulk_notifications(
+                    event.notification_type, event.related_id, event.user_ids, event.actor_id, db, **event.context
+                )
+                await db.commit()
+            await notification_service.publish_notifications(rows)
+            self.processed += 1
+            self.lag.observe(time.time() - event.created_at)
+        except Exception as e:
+            self.failed += 1
+            logging.error(f"Error processing {event.notification_type} notifications for {event.related_id}: {e}")
+
+    async def _recover_outbox(self):
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(schemas.NotificationOutbox).order_by(schemas.NotificationOutbox.created_at))
+            pending = result.scalars().all()
+        for entry in pending:
+            event = NotificationEvent(**{**entry.payload, "outbox_id": entry.id})
+            self.recovered += 1
+            await self.enqueue(event)
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "workers": len(self._workers),
+            "depth": self._queue.qsize() if self._queue else 0,
+            "max_size": self.max_size,
+            "processed": self.processed,
+            "failed": self.failed,
+            "inline_fallbacks": self.inline_fallbacks,
+            "recovered_from_outbox": self.recovered,
+            "lag_seconds": self.lag.snapshot(),
+        }
+
+notification_queue = NotificationQueue(settings.NOTIFICATION_QUEUE_MAX_SIZE, settings.NOTIFICATION_QUEUE_WORKERS)
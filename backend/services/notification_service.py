@@ -1,237 +1,150 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update, func, insert, case
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.encoders import jsonable_encoder
 from models import schemas
+from websocket_manager import notification_manager
 import logging
+import json
+import uuid
+from typing import Iterable, List, Optional
 from fastapi import HTTPException
 
-async def create_notification(notification_data: schemas.NotificationCreate, db: Session):
+# Notification type -> (model the related_id points at, title, message template).
+# Templates are formatted with {actor}, {subject} (the related row's name/title) and any extra context.
+NOTIFICATION_TEMPLATES = {
+    'project_invitation': (schemas.Project, "Project Invitation", "You have been invited to join the project '{subject}' by {actor}."),
+    'team_invitation': (schemas.Team, "Team Invitation", "You have been invited to join the team '{subject}' by {actor}."),
+    'remove_from_team': (schemas.Team, "Removed from Team", "You have been removed from the team '{subject}' by {actor}."),
+    'project_deleted': (None, "Project Deleted", "The project '{project_name}' has been deleted by {actor}."),
+    'role_changed': (schemas.Project, "Role Changed", "Your role in project '{subject}' has been changed to '{new_role}' by {actor}."),
+    'task_assigned': (schemas.Task, "New Task Assigned", "You have been assigned a new task: '{subject}' by {actor}."),
+    'task_status_changed': (schemas.Task, "Task Status Changed", "The status of task '{subject}' has been changed to '{new_status}' by {actor}."),
+    'task_submitted_for_approval': (schemas.Task, "Task Submitted for Approval", "Task '{subject}' has been submitted for approval by {actor}."),
+    'task_approved': (schemas.Task, "Task Approved", "Your submission for task '{subject}' has been approved by {actor}."),
+    'task_reopened': (schemas.Task, "Task Reopened", "Task '{subject}' has been reopened by {actor}."),
+    'task_changes_requested': (schemas.Task, "Task Changes Requested", "Changes have been requested for task '{subject}' by {actor}."),
+}
+
+async def _adjust_unread_count(user_ids: Iterable[str], delta: int, db: AsyncSession):
+    """Shift the denormalized unread counter in the caller's transaction, never below zero."""
+    column = schemas.User.unread_notification_count
+    await db.execute(update(schemas.User).filter(schemas.User.id.in_(list(user_ids))).values(
+        unread_notification_count=case((column + delta < 0, 0), else_=column + delta)
+    ).execution_options(synchronize_session=False))
+
+async def publish_notifications(notifications: Iterable):
+    """Push committed notifications (ORM rows or insert dicts) to their recipients' channels."""
+    for notification in notifications:
+        data = schemas.NotificationResponse(**notification) if isinstance(notification, dict) else schemas.NotificationResponse.from_orm(notification)
+        await notification_manager.broadcast(json.dumps({"type": "notification_created", "data": jsonable_encoder(data)}), data.user_id)
+
+async def publish_read(user_id: str, count: int, notification_id: Optional[str] = None):
+    """Tell a user's sockets that `count` notifications were read (all of them when no id is given)."""
+    if count:
+        message = {"type": "notifications_read", "data": {"id": notification_id, "unread_delta": -count}}
+        await notification_manager.broadcast(json.dumps(message), str(user_id))
+
+async def create_notification(notification_data: schemas.NotificationCreate, db: AsyncSession):
     try:
         new_notification = schemas.Notification(**notification_data.dict())
         db.add(new_notification)
-        db.commit()
-        db.refresh(new_notification)
+        await _adjust_unread_count([new_notification.user_id], 1, db)
+        await db.commit()
+        await publish_notifications([new_notification])
         return new_notification
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logging.error(f"Error creating notification: {e}")
 
-async def get_user_notifications(user_id: str, unread_only: bool, db: Session):
-    query = db.query(schemas.Notification).filter(schemas.Notification.user_id == user_id)
+def user_notifications_query(user_id: str, unread_only: bool):
+    query = select(schemas.Notification).filter(schemas.Notification.user_id == user_id)
     if unread_only:
         query = query.filter(schemas.Notification.is_read == False)
-    return query.order_by(schemas.Notification.created_at.desc()).limit(100).all()
+    return query.order_by(schemas.Notification.created_at.desc()).limit(100)
 
-async def mark_notification_read(notification_id: str, user_id: str, db: Session):
-    notification = db.query(schemas.Notification).filter(
+async def get_user_notifications(user_id: str, unread_only: bool, db: AsyncSession):
+    result = await db.execute(user_notifications_query(user_id, unread_only))
+    return result.scalars().all()
+
+async def mark_notification_read(notification_id: str, user_id: str, db: AsyncSession):
+    # Flip is_read in SQL so only the request that actually changed it decrements the counter
+    result = await db.execute(update(schemas.Notification).filter(
         schemas.Notification.id == notification_id,
-        schemas.Notification.user_id == user_id
-    ).first()
-    if notification:
-        notification.is_read = True
-        db.commit()
+        schemas.Notification.user_id == user_id,
+        schemas.Notification.is_read == False
+    ).values(is_read=True).execution_options(synchronize_session=False))
+    if result.rowcount:
+        await _adjust_unread_count([user_id], -1, db)
+        await db.commit()
+        await publish_read(user_id, 1, notification_id)
         return True
-    return False
+    result = await db.execute(select(schemas.Notification.id).filter(
+        schemas.Notification.id == notification_id,
+        schemas.Notification.user_id == user_id
+    ))
+    return result.first() is not None
 
-async def mark_all_notifications_read(user_id: str, db: Session):
+async def mark_all_notifications_read(user_id: str, db: AsyncSession):
     try:
-        updated_count = db.query(schemas.Notification).filter(
+        result = await db.execute(update(schemas.Notification).filter(
             schemas.Notification.user_id == user_id,
             schemas.Notification.is_read == False
-        ).update({"is_read": True}, synchronize_session=False)
-        db.commit()
-        return updated_count
+        ).values(is_read=True).execution_options(synchronize_session=False))
+        # Subtract what was marked rather than zeroing, so a notification committed
+        # concurrently by another transaction is still counted
+        if result.rowcount:
+            await _adjust_unread_count([user_id], -result.rowcount, db)
+        await db.commit()
+        await publish_read(user_id, result.rowcount)
+        return result.rowcount
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logging.error(f"Error marking all notifications as read: {e}")
         return 0
 
-async def get_unread_count(user_id: str, db: Session):
-    return db.query(schemas.Notification).filter(
-        schemas.Notification.user_id == user_id,
-        schemas.Notification.is_read == False
-    ).count()
-
-async def create_project_invitation_notification(project_id: str, invited_user_id: str, inviter_user_id: str, db: Session):
-    inviter = db.query(schemas.User).filter(schemas.User.id == inviter_user_id).first()
-    project = db.query(schemas.Project).filter(schemas.Project.id == project_id).first()
-
-    if not inviter or not project:
-        return
-
-    message = f"You have been invited to join the project '{project.name}' by {inviter.username}."
-    notification_data = schemas.NotificationCreate(
-        user_id=invited_user_id,
-        title="Project Invitation",
-        message=message,
-        type='project_invitation',
-        related_id=project_id
-    )
-    await create_notification(notification_data, db)
-
-async def create_team_invitation_notification(team_id: str, invited_user_id: str, inviter_user_id: str, db: Session):
-    inviter = db.query(schemas.User).filter(schemas.User.id == inviter_user_id).first()
-    team = db.query(schemas.Team).filter(schemas.Team.id == team_id).first()
-
-    if not inviter or not team:
-        return
-
-    message = f"You have been invited to join the team '{team.name}' by {inviter.username}."
-    notification_data = schemas.NotificationCreate(
-        user_id=invited_user_id,
-        title="Team Invitation",
-        message=message,
-        type='team_invitation',
-        related_id=team_id
-    )
-    await create_notification(notification_data, db)
-
-async def create_remove_from_team_notification(team_id: str, removed_user_id: str, remover_user_id: str, db: Session):
-    remover = db.query(schemas.User).filter(schemas.User.id == remover_user_id).first()
-    team = db.query(schemas.Team).filter(schemas.Team.id == team_id).first()
-
-    if not remover or not team:
-        return
-
-    message = f"You have been removed from the team '{team.name}' by {remover.username}."
-    notification_data = schemas.NotificationCreate(
-        user_id=removed_user_id,
-        title="Removed from Team",
-        message=message,
-        type='remove_from_team',
-        related_id=team_id
-    )
-    await create_notification(notification_data, db)
-
-async def create_project_deleted_notification(project_id: str, project_name: str, user_id: str, remover_user_id: str, db: Session):
-    remover = db.query(schemas.User).filter(schemas.User.id == remover_user_id).first()
-
-    if not remover:
-        return
-
-    message = f"The project '{project_name}' has been deleted by {remover.username}."
-    notification_data = schemas.NotificationCreate(
-        user_id=user_id,
-        title="Project Deleted",
-        message=message,
-        type='project_deleted',
-        related_id=project_id
-    )
-    await create_notification(notification_data, db)
-
-async def create_role_changed_notification(project_id: str, user_id: str, new_role: str, changer_user_id: str, db: Session):
-    changer = db.query(schemas.User).filter(schemas.User.id == changer_user_id).first()
-    project = db.query(schemas.Project).filter(schemas.Project.id == project_id).first()
-
-    if not changer or not project:
-        return
-
-    message = f"Your role in project '{project.name}' has been changed to '{new_role}' by {changer.username}."
-    notification_data = schemas.NotificationCreate(
-        user_id=user_id,
-        title="Role Changed",
-        message=message,
-        type='role_changed',
-        related_id=project_id
-    )
-    await create_notification(notification_data, db)
-
-async def create_task_assigned_notification(task_id: str, user_id: str, assigner_id: str, db: Session):
-    assigner = db.query(schemas.User).filter(schemas.User.id == assigner_id).first()
-    task = db.query(schemas.Task).filter(schemas.Task.id == task_id).first()
-
-    if not assigner or not task:
-        return
-
-    message = f"You have been assigned a new task: '{task.title}' by {assigner.username}."
-    notification_data = schemas.NotificationCreate(
-        user_id=user_id,
-        title="New Task Assigned",
-        message=message,
-        type='task_assigned',
-        related_id=task_id
-    )
-    await create_notification(notification_data, db)
-
-async def create_task_status_changed_notification(task_id: str, user_id: str, new_status: str, changer_id: str, db: Session):
-    changer = db.query(schemas.User).filter(schemas.User.id == changer_id).first()
-    task = db.query(schemas.Task).filter(schemas.Task.id == task_id).first()
-
-    if not changer or not task:
-        return
-
-    message = f"The status of task '{task.title}' has been changed to '{new_status}' by {changer.username}."
-    notification_data = schemas.NotificationCreate(
-        user_id=user_id,
-        title="Task Status Changed",
-        message=message,
-        type='task_status_changed',
-        related_id=task_id
-    )
-    await create_notification(notification_data, db)
-
-async def create_task_submitted_for_approval_notification(task_id: str, user_id: str, submitter_id: str, db: Session):
-    submitter = db.query(schemas.User).filter(schemas.User.id == submitter_id).first()
-    task = db.query(schemas.Task).filter(schemas.Task.id == task_id).first()
-
-    if not submitter or not task:
-        return
-
-    message = f"Task '{task.title}' has been submitted for approval by {submitter.username}."
-    notification_data = schemas.NotificationCreate(
-        user_id=user_id,
-        title="Task Submitted for Approval",
-        message=message,
-        type='task_submitted_for_approval',
-        related_id=task_id
-    )
-    await create_notification(notification_data, db)
-
-async def create_task_approved_notification(task_id: str, user_id: str, approver_id: str, db: Session):
-    approver = db.query(schemas.User).filter(schemas.User.id == approver_id).first()
-    task = db.query(schemas.Task).filter(schemas.Task.id == task_id).first()
-
-    if not approver or not task:
-        return
-
-    message = f"Your submission for task '{task.title}' has been approved by {approver.username}."
-    notification_data = schemas.NotificationCreate(
-        user_id=user_id,
-        title="Task Approved",
-        message=message,
-        type='task_approved',
-        related_id=task_id
-    )
-    await create_notification(notification_data, db)
-
-async def create_task_reopened_notification(task_id: str, user_id: str, reopener_id: str, db: Session):
-    reopener = db.query(schemas.User).filter(schemas.User.id == reopener_id).first()
-    task = db.query(schemas.Task).filter(schemas.Task.id == task_id).first()
-
-    if not reopener or not task:
-        return
-
-    message = f"Task '{task.title}' has been reopened by {reopener.username}."
-    notification_data = schemas.NotificationCreate(
-        user_id=user_id,
-        title="Task Reopened",
-        message=message,
-        type='task_reopened',
-        related_id=task_id
-    )
-    await create_notification(notification_data, db)
-
-async def create_task_changes_requested_notification(task_id: str, user_id: str, requester_id: str, db: Session):
-    requester = db.query(schemas.User).filter(schemas.User.id == requester_id).first()
-    task = db.query(schemas.Task).filter(schemas.Task.id == task_id).first()
-
-    if not requester or not task:
-        return
-
-    message = f"Changes have been requested for task '{task.title}' by {requester.username}."
-    notification_data = schemas.NotificationCreate(
-        user_id=user_id,
-        title="Task Changes Requested",
-        message=message,
-        type='task_changes_requested',
-        related_id=task_id
-    )
-    await create_notification(notification_data, db)
+def unread_count_query(user_id: str):
+    return select(schemas.User.unread_notification_count).filter(schemas.User.id == user_id)
+
+async def get_unread_count(user_id: str, db: AsyncSession):
+    result = await db.execute(unread_count_query(user_id))
+    return result.scalar_one_or_none() or 0
+
+async def create_bulk_notifications(notification_type: str, related_id: str, user_ids: Iterable[str], actor_id: str, db: AsyncSession, **context) -> List[dict]:
+    """Fan one event out to many recipients.
+
+    The actor and the related task/project/team are looked up once and every row
+    is written by a single multi-row INSERT. Nothing is committed here: the rows
+    become part of the caller's transaction.
+    """
+    recipient_ids = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+    if not recipient_ids:
+        return []
+
+    subject_model, title, template = NOTIFICATION_TEMPLATES[notification_type]
+    actor = await db.get(schemas.User, actor_id)
+    subject = await db.get(subject_model, related_id) if subject_model else None
+    if not actor or (subject_model and not subject):
+        return []
+
+    subject_name = None
+    if subject is not None:
+        subject_name = subject.title if isinstance(subject, schemas.Task) else subject.name
+    message = template.format(actor=actor.username, subject=subject_name, **context)
+
+    created_at = schemas.utcnow()
+    rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "title": title,
+            "message": message,
+            "type": notification_type,
+            "is_read": False,
+            "related_id": str(related_id),
+            "created_at": created_at,
+        }
+        for user_id in recipient_ids
+    ]
+    await db.execute(insert(schemas.Notification), rows)
+    await _adjust_unread_count(recipient_ids, 1, db)
+    return rows
@@ -0,0 +1,56 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque, URL-safe cursor for the sort key of the last row on a page."""
+    raw = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, datetime_positions: Sequence[int] = ()) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        for position in datetime_positions:
+            values[position] = datetime.fromisoformat(values[position])
+        return values
+    except (ValueError, TypeError, IndexError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+
+def keyset_page(query, sort_columns: Sequence, cursor: Optional[str], page: int, per_page: int, descending: bool = True):
+    """Order by sort_columns and select one page.
+
+    With a cursor the page starts right after the row the cursor was made from
+    (a single index range scan); without one it falls back to OFFSET paging.
+    One extra row is fetched so the caller can tell whether a next page exists.
+    """
+    datetime_positions = [i for i, column in enumerate(sort_columns) if _is_datetime(column)]
+    if cursor:
+        values = decode_cursor(cursor, datetime_positions)
+        if len(values) != len(sort_columns):
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+        if descending:
+            query = query.filter(tuple_(*sort_columns) < tuple_(*values))
+        else:
+            query = query.filter(tuple_(*sort_columns) > tuple_(*values))
+    else:
+        query = query.offset((page - 1) * per_page)
+    order = [column.desc() if descending else column.asc() for column in sort_columns]
+    return query.order_by(*order).limit(per_page + 1)
+
+def next_cursor(rows: list, per_page: int, key) -> Optional[str]:
+    """Trim the look-ahead row and return the cursor for the following page, if any."""
+    if len(rows) <= per_page:
+        return None
+    del rows[per_page:]
+    return encode_cursor(key(rows[-1]))
+
+def _is_datetime(column) -> bool:
+    try:
+        return column.type.python_type is datetime
+    except NotImplementedError:
+        return False
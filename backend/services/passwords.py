@@ -0,0 +1,49 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from config import settings
+
+# Pinning min and max to the configured cost makes any hash made with a different
+# cost "need update", so verify_password hands back a rehash after the cost changes.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+# bcrypt releases the GIL while it works, so a few threads keep hashing off the event
+# loop without the pickling and start-up cost of a process pool. Calls beyond
+# PASSWORD_HASH_WORKERS wait in the executor's queue.
+_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+async def hash_password(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_executor, pwd_context.hash, password)
+
+# Moving average of how long verify_password takes, queueing for a thread included
+_verify_seconds: Optional[float] = None
+
+async def verify_password(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Check a password; the second value is a replacement hash when the stored one uses an outdated cost."""
+    global _verify_seconds
+    started = time.perf_counter()
+    result = await asyncio.get_running_loop().run_in_executor(_executor, pwd_context.verify_and_update, password, hashed_password)
+    elapsed = time.perf_counter() - started
+    _verify_seconds = elapsed if _verify_seconds is None else 0.9 * _verify_seconds + 0.1 * elapsed
+    return result
+
+async def reject_unknown_user():
+    """Take as long as a failed verify_password, so response times do not reveal which emails exist.
+
+    Sleeps instead of hashing, so a flood of logins for made-up emails costs no CPU.
+    """
+    if _verify_seconds is None:
+        # One real verify per process to learn what a verify costs on this machine
+        await verify_password("", await hash_password(""))
+        return
+    await asyncio.sleep(_verify_seconds)
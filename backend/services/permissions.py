@@ -0,0 +1,212 @@
+import threading
+import time
+from dataclasses import dataclass
+from enum import IntFlag
+from typing import Dict, Iterable, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models import schemas
+
+class Permission(IntFlag):
+    READ = 1
+    VIEW_ALL_TASKS = 2
+    MANAGE_TASKS = 4
+    MANAGE_MEMBERS = 8
+    EDIT = 16
+    DELETE = 32
+
+ALL_PERMISSIONS = Permission.READ | Permission.VIEW_ALL_TASKS | Permission.MANAGE_TASKS | Permission.MANAGE_MEMBERS | Permission.EDIT | Permission.DELETE
+
+# Role.permissions holds these names; "*" grants everything
+PERMISSION_NAMES = {permission.name.lower(): permission for permission in Permission}
+
+OWNER_ROLE = "Owner"
+MEMBER_ROLE = "Member"
+
+# Owner rights come from project.owner_id / team.owner_id alone: a member whose role row says
+# "Owner" is treated as a plain member, and no role grants DELETE
+OWNER_ONLY_PERMISSIONS = Permission.DELETE
+
+# Used for roles with no row in the roles table; matches initialize_default_roles.
+# Any other role name (e.g. "Admin") counts as a plain member.
+DEFAULT_ROLE_PERMISSIONS = {MEMBER_ROLE: Permission.READ}
+
+def permission_mask(names: Iterable[str]) -> int:
+    mask = 0
+    for name in names:
+        mask |= ALL_PERMISSIONS if name == "*" else PERMISSION_NAMES.get(name, 0)
+    return mask
+
+def team_member_exists(team_id, user_id: str):
+    """EXISTS on the team_members primary key, instead of loading every member to look for one."""
+    return exists().where(
+        schemas.team_member_association.c.team_id == team_id,
+        schemas.team_member_association.c.user_id == user_id,
+    )
+
+@dataclass(frozen=True)
+class Access:
+    """What one user may do in one project or team. role is None when they are not a member."""
+    role: Optional[str]
+    permissions: int
+    owner_id: str
+
+    @property
+    def is_member(self) -> bool:
+        return self.role is not None
+
+    def can(self, permission: Permission) -> bool:
+        return self.permissions & permission == permission
+
+class PermissionResolver:
+    """Resolves a user's Access to a project or team with one query.
+
+    Results are memoized on the database session, so they last for the request,
+    and kept for PERMISSION_CACHE_TTL_SECONDS across requests. Controllers that
+    change membership or roles call invalidate_project / invalidate_team after
+    committing; other workers see the change once their entry expires.
+    """
+
+    MAX_CACHED_SCOPES = 10000
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Tuple[str, str], Dict[str, Tuple[Access, float]]] = {}
+        self._role_masks: Optional[Dict[str, int]] = None
+        self._role_masks_expire_at = 0.0
+        self._lock = threading.Lock()
+
+    async def project(self, db: AsyncSession, user_id: str, project_id: str) -> Optional[Access]:
+        """None when the project does not exist."""
+        return await self._resolve(db, ("project", str(project_id)), str(user_id), self._load_project)
+
+    async def team(self, db: AsyncSession, user_id: str, team_id: str) -> Optional[Access]:
+        """None when the team does not exist."""
+        return await self._resolve(db, ("team", str(team_id)), str(user_id), self._load_team)
+
+    def invalidate_project(self, project_id: str):
+        self._invalidate(("project", str(project_id)))
+
+    def invalidate_team(self, team_id: str):
+        self._invalidate(("team", str(team_id)))
+
+    def invalidate_roles(self):
+        with self._lock:
+            self._role_masks = None
+            self._entries.clear()
+
+    async def _resolve(self, db: AsyncSession, scope: Tuple[str, str], user_id: str, load) -> Optional[Access]:
+        memo = db.info.setdefault("resolved_permissions", {})
+        if (scope, user_id) in memo:
+            return memo[(scope, user_id)]
+
+        access = self._cached(scope, user_id)
+        if access is None:
+            access = await load(db, scope[1], user_id)
+            if access is not None:
+                self._store(scope, user_id, access)
+        memo[(scope, user_id)] = access
+        return access
+
+    async def _load_project(self, db: AsyncSession, project_id: str, user_id: str) -> Optional[Access]:
+        Project, ProjectMemberRole = schemas.Project, schemas.ProjectMemberRole
+        # Loading the Project entity puts it in the session, so a later db.get() in the same request is free
+        result = await db.execute(
+            select(Project, ProjectMemberRole.role)
+            .outerjoin(ProjectMemberRole, and_(ProjectMemberRole.project_id == Project.id, ProjectMemberRole.user_id == user_id))
+            .filter(Project.id == project_id)
+        )
+        row = result.first()
+        if not row:
+            return None
+        project, role = row
+        return await self._access(db, str(project.owner_id), user_id, role)
+
+    async def _load_team(self, db: AsyncSession, team_id: str, user_id: str) -> Optional[Access]:
+        result = await db.execute(select(schemas.Team, team_member_exists(schemas.Team.id, user_id)).filter(schemas.Team.id == team_id))
+        row = result.first()
+        if not row:
+            return None
+        team, is_member = row
+        return await self._access(db, str(team.owner_id), user_id, "Member" if is_member else None)
+
+    async def _access(self, db: AsyncSession, owner_id: str, user_id: str, role: Optional[str]) -> Access:
+        if owner_id == user_id:
+            return Access(OWNER_ROLE, ALL_PERMISSIONS, owner_id)
+        if role is None:
+            return Access(None, 0, owner_id)
+        masks = await self._load_role_masks(db)
+        return Access(role, masks.get(role, Permission.READ) & ~OWNER_ONLY_PERMISSIONS, owner_id)
+
+    async def assignable_roles(self, db: AsyncSession) -> set:
+        """Role names a project member may be given: every known role except Owner."""
+        return set(await self._load_role_masks(db))
+
+    async def _load_role_masks(self, db: AsyncSession) -> Dict[str, int]:
+        if self._role_masks is not None and self._role_masks_expire_at > time.monotonic():
+            return self._role_masks
+        result = await db.execute(select(schemas.Role.name, schemas.Role.permissions))
+        masks = dict(DEFAULT_ROLE_PERMISSIONS)
+        masks.update({name: permission_mask(permissions or []) for name, permissions in result.all()})
+        masks.pop(OWNER_ROLE, None)
+        with self._lock:
+            self._role_masks = masks
+            self._role_masks_expire_at = time.monotonic() + self.ttl
+        return masks
+
+    def _cached(self, scope: Tuple[str, str], user_id: str) -> Optional[Access]:
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(scope, {}).get(user_id)
+            if entry is not None and entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def _store(self, scope: Tuple[str, str], user_id: str, access: Access):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if scope not in self._entries and len(self._entries) >= self.MAX_CACHED_SCOPES:
+                self._entries.clear()
+            self._entries.setdefault(scope, {})[user_id] = (access, time.monotonic() + self.ttl)
+
+    def _invalidate(self, scope: Tuple[str, str]):
+        with self._lock:
+            self._entries.pop(scope, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "ttl_seconds": self.ttl,
+            "cached_scopes": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+permission_resolver = PermissionResolver(settings.PERMISSION_CACHE_TTL_SECONDS)
+
+async def require_project(db: AsyncSession, current_user: schemas.User, project_id: str, permission: Permission, detail: str) -> Access:
+    access = await permission_resolver.project(db, current_user.id, project_id)
+    if access is None:
+        raise HTTPException(status_code=404, detail="Project not found.")
+    if not access.can(permission):
+        raise HTTPException(status_code=403, detail=detail)
+    return access
+
+async def require_team(db: AsyncSession, current_user: schemas.User, team_id: str, permission: Permission, detail: str) -> Access:
+    access = await permission_resolver.team(db, current_user.id, team_id)
+    if access is None:
+        raise HTTPException(status_code=404, detail="Team not found.")
+    if not access.can(permission):
+        raise HTTPException(status_code=403, detail=detail)
+    return access
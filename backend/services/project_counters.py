@@ -0,0 +1,129 @@
+import asyncio
+import logging
+from typing import Iterable, Optional
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models import schemas
+from models.database import AsyncSessionLocal
+
+Project = schemas.Project
+
+# Task status -> the Project column counting tasks in it
+STATUS_COLUMNS = {
+    "todo": Project.todo_task_count,
+    "in_progress": Project.in_progress_task_count,
+    "pending_approval": Project.pending_approval_task_count,
+    "completed": Project.completed_task_count,
+}
+
+async def adjust_member_count(project_id: str, delta: int, db: AsyncSession):
+    """Runs in the caller's transaction, so the counter commits or rolls back with the membership change."""
+    await db.execute(update(Project).filter(Project.id == project_id).values(member_count=Project.member_count + delta))
+
+async def adjust_task_counts(project_id: Optional[str], old_status: Optional[str], new_status: Optional[str], db: AsyncSession):
+    """Move one task between status counters; old_status None for a new task, new_status None for a deleted one."""
+    if project_id is None or old_status == new_status:
+        return
+    values = {}
+    if old_status in STATUS_COLUMNS:
+        column = STATUS_COLUMNS[old_status]
+        values[column.key] = column - 1
+    if new_status in STATUS_COLUMNS:
+        column = STATUS_COLUMNS[new_status]
+        values[column.key] = column + 1
+    if values:
+        await db.execute(update(Project).filter(Project.id == project_id).values(**values))
+
+def _actual_counts():
+    """Correlated subqueries recomputing every counter from project_member_roles and tasks."""
+    member_count = (
+        select(func.count()).select_from(schemas.ProjectMemberRole)
+        .filter(schemas.ProjectMemberRole.project_id == Project.id).scalar_subquery()
+    )
+    counts = {Project.member_count.key: member_count}
+    for status, column in STATUS_COLUMNS.items():
+        counts[column.key] = (
+            select(func.count()).select_from(schemas.Task)
+            .filter(schemas.Task.project_id == Project.id, schemas.Task.status == status).scalar_subquery()
+        )
+    return counts
+
+async def repair_counters(db: AsyncSession, project_ids: Optional[Iterable[str]] = None, batch_size: Optional[int] = None) -> int:
+    """Recompute the counters, batch by batch in id order, and return how many projects had drifted.
+
+    Drift comes from writes that bypass the controllers, such as users deleted
+    straight from the database (their project_member_roles rows cascade away).
+    """
+    batch_size = batch_size or settings.PROJECT_COUNTER_REPAIR_BATCH_SIZE
+    counts = _actual_counts()
+    drifted = or_(*[getattr(Project, key) != actual for key, actual in counts.items()])
+    repaired = 0
+    last_id = None
+    while True:
+        ids = select(Project.id).order_by(Project.id).limit(batch_size)
+        if project_ids is not None:
+            ids = ids.filter(Project.id.in_(list(project_ids)))
+        if last_id is not None:
+            ids = ids.filter(Project.id > last_id)
+        batch = (await db.execute(ids)).scalars().all()
+        if not batch:
+            return repaired
+        result = await db.execute(
+            update(Project).filter(Project.id.in_(batch), drifted).values(**counts)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        repaired += result.rowcount
+        last_id = batch[-1]
+
+class CounterRepairJob:
+    """Runs repair_counters every PROJECT_COUNTER_REPAIR_INTERVAL_SECONDS; 0 leaves it to the admin endpoint."""
+
+    def __init__(self, interval: int):
+        self.interval = interval
+        self.runs = 0
+        self.repaired = 0
+        self.last_repaired: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self, project_ids: Optional[Iterable[str]] = None) -> int:
+        async with AsyncSessionLocal() as db:
+            repaired = await repair_counters(db, project_ids)
+        self.runs += 1
+        self.repaired += repaired
+        self.last_repaired = repaired
+        if repaired:
+            logging.warning(f"Repaired drifted counters on {repaired} projects.")
+        return repaired
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logging.error(f"Error repairing project counters: {e}")
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "interval_seconds": self.interval,
+            "running": self._task is not None,
+            "runs": self.runs,
+            "repaired": self.repaired,
+            "last_repaired": self.last_repaired,
+        }
+
+counter_repair_job = CounterRepairJob(settings.PROJECT_COUNTER_REPAIR_INTERVAL_SECONDS)
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from sqlalchemy.engine import make_url
+
+from config import settings
+
+# Receives (key, message) for every message published under the namespace it subscribed to
+Handler = Callable[[str, str], Awaitable[None]]
+
+class InMemoryPubSub:
+    """Single-process backend: publishing hands the message straight to the local subscriber.
+
+    This is the default and doubles as the fake for exercising ConnectionManager
+    without a broker; share one instance between managers to stand in for workers.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, Handler] = {}
+
+    def subscribe(self, namespace: str, handler: Handler):
+        self._handlers[namespace] = handler
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, namespace: str, key: str, message: str):
+        await self._dispatch(namespace, key, message)
+
+    async def _dispatch(self, namespace: str, key: str, message: str):
+        handler = self._handlers.get(namespace)
+        if handler is not None:
+            await handler(key, message)
+
+class RedisPubSub(InMemoryPubSub):
+    """Redis PUBLISH/PSUBSCRIBE, one channel per namespace and key.
+
+    Accepts any client exposing the redis.asyncio publish/pubsub API, which covers
+    redis itself as well as compatible stand-ins such as fakeredis or KeyDB.
+    """
+
+    def __init__(self, client, prefix: str = "projecthub:ws:"):
+        super().__init__()
+        self.client = client
+        self.prefix = prefix
+        self._listener: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_url(cls, url: str):
+        try:
+            import redis.asyncio
+        except ImportError as e:
+            raise RuntimeError("WS_PUBSUB_BACKEND is 'redis' but the 'redis' package is not installed.") from e
+        return cls(redis.asyncio.Redis.from_url(url))
+
+    async def start(self):
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    async def publish(self, namespace: str, key: str, message: str):
+        await self.client.publish(f"{self.prefix}{namespace}:{key}", message)
+
+    async def _listen(self):
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.psubscribe(f"{self.prefix}*")
+                async for item in pubsub.listen():
+                    if item["type"] != "pmessage":
+                        continue
+                    channel, data = item["channel"], item["data"]
+                    if isinstance(channel, bytes):
+                        channel = channel.decode()
+                    if isinstance(data, bytes):
+                        data = data.decode()
+                    namespace, _, key = channel[len(self.prefix):].partition(":")
+                    await self._dispatch(namespace, key, data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Redis pub/sub listener failed, resubscribing: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
+
+class PostgresPubSub(InMemoryPubSub):
+    """LISTEN/NOTIFY on the application database, so no extra infrastructure is needed.
+
+    NOTIFY payloads are capped at 8000 bytes; larger messages are delivered to this
+    worker's sockets only and logged.
+    """
+
+    MAX_PAYLOAD_BYTES = 7900
+
+    def __init__(self, dsn: str, channel: str = "projecthub_ws"):
+        super().__init__()
+        self.dsn = dsn
+        self.channel = channel
+        self._connection = None
+        self._lock = asyncio.Lock()
+        self._supervisor: Optional[asyncio.Task] = None
+        # Dispatches started by _on_notify; the event loop only keeps weak references to tasks
+        self._deliveries: Set[asyncio.Task] = set()
+
+    @classmethod
+    def from_url(cls, url: str):
+        # asyncpg wants a plain libpq URL, without the SQLAlchemy driver suffix
+        return cls(make_url(url).set(drivername="postgresql").render_as_string(hide_password=False))
+
+    async def start(self):
+        if self._supervisor is None:
+            self._supervisor = asyncio.create_task(self._supervise())
+
+    async def stop(self):
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+            await asyncio.gather(self._supervisor, return_exceptions=True)
+            self._supervisor = None
+        if self._deliveries:
+            await asyncio.gather(*self._deliveries, return_exceptions=True)
+
+    async def publish(self, namespace: str, key: str, message: str):
+        payload = json.dumps({"n": namespace, "k": key, "m": message})
+        if len(payload.encode()) > self.MAX_PAYLOAD_BYTES or self._connection is None:
+            logging.warning(f"Delivering {namespace}:{key} locally only; message too large for NOTIFY or listener not connected.")
+            await self._dispatch(namespace, key, message)
+            return
+        # One asyncpg connection runs one statement at a time
+        async with self._lock:
+            await self._connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        data = json.loads(payload)
+        task = asyncio.create_task(self._dispatch(data["n"], data["k"], data["m"]))
+        self._deliveries.add(task)
+        task.add_done_callback(self._delivered)
+
+    def _delivered(self, task: asyncio.Task):
+        self._deliveries.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logging.error(f"Postgres pub/sub delivery failed: {task.exception()}")
+
+    async def _supervise(self):
+        import asyncpg
+        while True:
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                closed = asyncio.get_running_loop().create_future()
+                connection.add_termination_listener(lambda _: closed.done() or closed.set_result(None))
+                await connection.add_listener(self.channel, self._on_notify)
+                self._connection = connection
+                await closed
+            except asyncio.CancelledError:
+                if self._connection is not None:
+                    await self._connection.close()
+                    self._connection = None
+                raise
+            except Exception as e:
+                logging.error(f"Postgres LISTEN connection failed, reconnecting: {e}")
+            self._connection = None
+            await asyncio.sleep(1)
+
+def create_pubsub():
+    if settings.WS_PUBSUB_BACKEND == "redis":
+        return RedisPubSub.from_url(settings.WS_PUBSUB_URL)
+    if settings.WS_PUBSUB_BACKEND == "postgres":
+        return PostgresPubSub.from_url(settings.WS_PUBSUB_URL or settings.DATABASE_URL)
+    return InMemoryPubSub()
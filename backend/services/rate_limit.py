@@ -0,0 +1,156 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+from fastapi import HTTPException, Request, status
+
+from config import settings
+
+class InMemoryBucketBackend:
+    """Per-process token buckets, dropping the least recently used key when full."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, capacity: int, cost: int) -> Tuple[bool, float]:
+        """Refill the bucket and take cost tokens if at least max(cost, 1) are left; returns (allowed, tokens left)."""
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(capacity), now]
+                while len(self._buckets) > self.max_size:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            allowed = tokens >= max(cost, 1)
+            if allowed:
+                tokens -= cost
+            bucket[0], bucket[1] = tokens, now
+            return allowed, tokens
+
+# Same algorithm as InMemoryBucketBackend.take, run atomically inside Redis on Redis' own clock
+_TAKE_SCRIPT = """
+local rate, capacity, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= math.max(cost, 1) then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+class RedisBucketBackend:
+    """Shared buckets so a client cannot multiply its allowance by spreading requests over workers.
+
+    Accepts any client exposing the redis-py register_script API, which covers
+    redis itself as well as compatible stand-ins such as fakeredis or KeyDB.
+    """
+
+    def __init__(self, client, prefix: str = "projecthub:ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+        self._take = client.register_script(_TAKE_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("RATE_LIMIT_URL is set but the 'redis' package is not installed.") from e
+        return cls(redis.Redis.from_url(url))
+
+    def take(self, key: str, rate: float, capacity: int, cost: int) -> Tuple[bool, float]:
+        allowed, tokens = self._take(keys=[self.prefix + key], args=[rate, capacity, cost])
+        return bool(allowed), float(tokens)
+
+class RateLimiter:
+    """A family of token buckets: `burst` requests at once, refilled at `per_minute` per minute."""
+
+    def __init__(self, backend, name: str, per_minute: float, burst: int):
+        self.backend = backend
+        self.name = name
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.allowed = 0
+        self.rejected = 0
+
+    def hit(self, key: str, cost: int = 1):
+        """Spend cost tokens for key, raising 429 when the bucket is empty. cost=0 only checks."""
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        try:
+            allowed, tokens = self.backend.take(f"{self.name}:{key}", self.rate, self.burst, cost)
+        except Exception as e:
+            # Fail open: an unreachable limiter store should not take login down with it
+            logging.warning(f"Rate limit check for {self.name} failed: {e}")
+            return
+        if allowed:
+            self.allowed += 1
+            return
+        self.rejected += 1
+        retry_after = max(1, math.ceil((max(cost, 1) - tokens) / self.rate))
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts. Please try again later.",
+            headers={
+                "Retry-After": str(retry_after),
+                "RateLimit-Limit": str(self.burst),
+                "RateLimit-Remaining": "0",
+                "RateLimit-Reset": str(retry_after),
+            },
+        )
+
+    def stats(self) -> dict:
+        return {
+            "per_minute": self.rate * 60,
+            "burst": self.burst,
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+        }
+
+def client_ip(request: Request) -> str:
+    """The caller's address, taken from X-Forwarded-For when RATE_LIMIT_TRUSTED_PROXIES hops are in front of us."""
+    hops = settings.RATE_LIMIT_TRUSTED_PROXIES
+    if hops > 0:
+        forwarded = [part.strip() for part in request.headers.get("x-forwarded-for", "").split(",") if part.strip()]
+        if forwarded:
+            # Each trusted proxy appends the address it saw, so count back from the right
+            return forwarded[-min(hops, len(forwarded))]
+    return request.client.host if request.client else "unknown"
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+def _create_backend():
+    if settings.RATE_LIMIT_URL:
+        return RedisBucketBackend.from_url(settings.RATE_LIMIT_URL)
+    return InMemoryBucketBackend(settings.RATE_LIMIT_MAX_KEYS)
+
+_backend = _create_backend()
+login_ip_limiter = RateLimiter(_backend, "login-ip", settings.LOGIN_IP_PER_MINUTE, settings.LOGIN_IP_BURST)
+# Charged for failed logins only, so an account's own successful sign-ins never count against it
+login_email_limiter = RateLimiter(_backend, "login-email", settings.LOGIN_EMAIL_PER_MINUTE, settings.LOGIN_EMAIL_BURST)
+register_ip_limiter = RateLimiter(_backend, "register-ip", settings.REGISTER_IP_PER_MINUTE, settings.REGISTER_IP_BURST)
+register_email_limiter = RateLimiter(_backend, "register-email", settings.REGISTER_EMAIL_PER_MINUTE, settings.REGISTER_EMAIL_BURST)
+
+def stats() -> dict:
+    return {
+        "backend": type(_backend).__name__,
+        "enabled": settings.RATE_LIMIT_ENABLED,
+        "limiters": {limiter.name: limiter.stats() for limiter in (login_ip_limiter, login_email_limiter, register_ip_limiter, register_email_limiter)},
+    }
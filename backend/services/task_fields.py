@@ -0,0 +1,106 @@
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Union
+
+from fastapi import HTTPException
+from pydantic import create_model
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import schemas
+
+Task = schemas.Task
+
+# Fields a task list can be narrowed to with ?fields=; all but the last two are plain columns
+TASK_COLUMNS = {
+    name: getattr(Task, name) for name in (
+        "id", "title", "description", "notes", "project_id", "owner_id", "assigned_by", "status",
+        "priority", "created_at", "assigned_at", "accepted_at", "completed_at", "deadline",
+    )
+}
+TASK_RELATIONS = ("assignee_ids", "project")
+
+# Named field sets, usable as fields=board
+TASK_FIELD_PRESETS = {
+    "board": frozenset({"id", "title", "status", "priority", "deadline"}),
+}
+
+def parse_fields(fields: Optional[str]) -> Optional[FrozenSet[str]]:
+    """None (the full TaskSummary) when fields is not given; id is always included."""
+    if fields is None:
+        return None
+    if fields in TASK_FIELD_PRESETS:
+        return TASK_FIELD_PRESETS[fields]
+    names = frozenset(name.strip() for name in fields.split(",") if name.strip()) | {"id"}
+    unknown = names - TASK_COLUMNS.keys() - set(TASK_RELATIONS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown task fields: {', '.join(sorted(unknown))}.")
+    return names
+
+def lean_task_query(fields: FrozenSet[str]):
+    """Select only the requested columns, plus created_at and id for the keyset cursor."""
+    names = (fields & TASK_COLUMNS.keys()) | {"id", "created_at"}
+    if "project" in fields:
+        names |= {"project_id"}
+    names = sorted(names)
+    return select(*[TASK_COLUMNS[name] for name in names])
+
+@lru_cache(maxsize=128)
+def task_page_model(fields: FrozenSet[str]):
+    """PaginatedTaskSummaryResponse narrowed to fields, built once per field set."""
+    task_model = create_model(
+        "TaskFields",
+        **{name: (info.annotation, info) for name, info in schemas.TaskSummary.model_fields.items() if name in fields},
+    )
+    return create_model(
+        "PaginatedTaskFieldsResponse",
+        tasks=(List[task_model], ...),
+        total_count=(Optional[int], None),
+        next_cursor=(Optional[str], None),
+    )
+
+# What the list routes document for fields=: the page model for every field, each one optional
+# since only the requested fields (and id) are present
+PaginatedTaskFieldsResponse = create_model(
+    "PaginatedTaskFieldsResponse",
+    tasks=(List[create_model(
+        "TaskFields",
+        id=(str, ...),
+        **{name: (Optional[info.annotation], None) for name, info in schemas.TaskSummary.model_fields.items() if name != "id"},
+    )], ...),
+    total_count=(Optional[int], None),
+    next_cursor=(Optional[str], None),
+)
+
+# The list routes return a plain Response for fields=, which response_model would not describe
+TASK_LIST_RESPONSES = {
+    200: {
+        "model": Union[schemas.PaginatedTaskSummaryResponse, PaginatedTaskFieldsResponse],
+        "description": "Full task summaries, or only the requested fields when fields= is given.",
+    },
+}
+
+async def lean_task_rows(rows, fields: FrozenSet[str], db: AsyncSession) -> List[dict]:
+    """Rows from lean_task_query as dicts holding just fields, with the relations fetched in one query each."""
+    tasks = [{name: row._mapping[name] for name in fields if name in TASK_COLUMNS} for row in rows]
+    ids = [row.id for row in rows]
+    if "assignee_ids" in fields:
+        assignees: Dict[str, List[str]] = {task_id: [] for task_id in ids}
+        if ids:
+            association = schemas.task_assignee_association
+            result = await db.execute(select(association.c.task_id, association.c.user_id).filter(association.c.task_id.in_(ids)))
+            for task_id, user_id in result.all():
+                assignees[task_id].append(str(user_id))
+        for task, task_id in zip(tasks, ids):
+            task["assignee_ids"] = assignees[task_id]
+    if "project" in fields:
+        project_ids = {row.project_id for row in rows if row.project_id}
+        projects = {}
+        if project_ids:
+            result = await db.execute(select(schemas.Project).filter(schemas.Project.id.in_(project_ids)))
+            projects = {project.id: schemas.ProjectResponse.model_validate(project) for project in result.scalars()}
+        for task, row in zip(tasks, rows):
+            task["project"] = projects.get(row.project_id)
+    return tasks
+
+for preset in TASK_FIELD_PRESETS.values():
+    task_page_model(preset)
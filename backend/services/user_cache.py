@@ -0,0 +1,140 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+from config import settings
+from models import schemas
+
+# Columns copied into the cache. hashed_password is deliberately left out.
+CACHED_USER_FIELDS = ("id", "username", "email", "full_name", "is_active", "created_at")
+
+class InMemoryCacheBackend:
+    """Per-process TTL cache that evicts the least recently used entry when full."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: int):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+class RedisCacheBackend:
+    """Shared backend so every worker sees the same entries and invalidations.
+
+    Accepts any client exposing the redis-py get/set/delete API, which covers
+    redis itself as well as compatible stand-ins such as fakeredis or KeyDB.
+    """
+
+    def __init__(self, client, prefix: str = "projecthub:user:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("USER_CACHE_URL is set but the 'redis' package is not installed.") from e
+        return cls(redis.Redis.from_url(url))
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(self.prefix + key)
+        if isinstance(value, bytes):
+            value = value.decode()
+        return value
+
+    def set(self, key: str, value: str, ttl: int):
+        self.client.set(self.prefix + key, value, ex=ttl)
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+class UserCache:
+    """Caches the authenticated user by JWT subject so get_current_user can skip the database."""
+
+    def __init__(self, backend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user_id: str) -> Optional[schemas.User]:
+        if self.ttl <= 0:
+            return None
+        try:
+            raw = self.backend.get(str(user_id))
+        except Exception as e:
+            logging.warning(f"User cache lookup failed: {e}")
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        data = json.loads(raw)
+        data["created_at"] = datetime.fromisoformat(data["created_at"]) if data["created_at"] else None
+        # A transient instance: it is never attached to a session, so it is read-only in practice
+        return schemas.User(**data)
+
+    def set(self, user: schemas.User):
+        if self.ttl <= 0:
+            return
+        data = {field: getattr(user, field) for field in CACHED_USER_FIELDS}
+        data["id"] = str(data["id"])
+        data["created_at"] = data["created_at"].isoformat() if data["created_at"] else None
+        try:
+            self.backend.set(data["id"], json.dumps(data), self.ttl)
+        except Exception as e:
+            logging.warning(f"User cache write failed: {e}")
+
+    def invalidate(self, user_id: str):
+        self.invalidations += 1
+        # Called after the change has committed, so a cache outage must not fail the request;
+        # the stale entry then lives until its TTL runs out
+        try:
+            self.backend.delete(str(user_id))
+        except Exception as e:
+            logging.warning(f"User cache invalidation failed, entry expires within {self.ttl}s: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+def _create_backend():
+    if settings.USER_CACHE_URL:
+        return RedisCacheBackend.from_url(settings.USER_CACHE_URL)
+    return InMemoryCacheBackend(settings.USER_CACHE_MAX_SIZE)
+
+user_cache = UserCache(_create_backend(), settings.USER_CACHE_TTL_SECONDS)
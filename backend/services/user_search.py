@@ -0,0 +1,183 @@
+import asyncio
+import bisect
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import case, func, or_, select, tuple_
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models import schemas
+from services.pagination import decode_cursor, encode_cursor
+from services.user_cache import InMemoryCacheBackend
+
+MAX_QUERY_LENGTH = 100
+
+# Lower ranks sort first; a result's cursor is (rank, lowercased username, id)
+RANK_EXACT_USERNAME = 0
+RANK_USERNAME_PREFIX = 1
+RANK_NAME_PREFIX = 2
+RANK_EMAIL_PREFIX = 3
+RANK_CONTAINS = 4
+
+def _rank(query: str, username: str, full_name: str, email: str) -> Optional[int]:
+    """Python twin of TrigramSearch's CASE expression; None when nothing matches."""
+    username, full_name, email = username.lower(), full_name.lower(), email.lower()
+    if username == query:
+        return RANK_EXACT_USERNAME
+    if username.startswith(query):
+        return RANK_USERNAME_PREFIX
+    if full_name.startswith(query) or f" {query}" in full_name:
+        return RANK_NAME_PREFIX
+    if email.startswith(query):
+        return RANK_EMAIL_PREFIX
+    if query in username or query in full_name or query in email:
+        return RANK_CONTAINS
+    return None
+
+def _team_member_ids(team_id: str):
+    return select(schemas.team_member_association.c.user_id).filter(schemas.team_member_association.c.team_id == team_id)
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+class TrigramSearch:
+    """Substring search in SQL. On PostgreSQL the ILIKEs are served by the pg_trgm GIN indexes from migration 0003."""
+
+    async def search(self, db: AsyncSession, query: str, limit: int, after: Optional[list], team_id: Optional[str], exclude_id: Optional[str]) -> List[Tuple[tuple, schemas.User]]:
+        User = schemas.User
+        pattern = _escape_like(query)
+        rank = case(
+            (func.lower(User.username) == query, RANK_EXACT_USERNAME),
+            (User.username.ilike(f"{pattern}%", escape="\\"), RANK_USERNAME_PREFIX),
+            (or_(User.full_name.ilike(f"{pattern}%", escape="\\"), User.full_name.ilike(f"% {pattern}%", escape="\\")), RANK_NAME_PREFIX),
+            (User.email.ilike(f"{pattern}%", escape="\\"), RANK_EMAIL_PREFIX),
+            else_=RANK_CONTAINS,
+        )
+        sort_key = (rank, func.lower(User.username), User.id)
+        stmt = select(User, *sort_key).filter(or_(
+            User.username.ilike(f"%{pattern}%", escape="\\"),
+            User.full_name.ilike(f"%{pattern}%", escape="\\"),
+            User.email.ilike(f"%{pattern}%", escape="\\"),
+        ))
+        if team_id is not None:
+            stmt = stmt.filter(User.id.in_(_team_member_ids(team_id)))
+        if exclude_id is not None:
+            stmt = stmt.filter(User.id != exclude_id)
+        if after is not None:
+            stmt = stmt.filter(tuple_(*sort_key) > tuple_(*after))
+        result = await db.execute(stmt.order_by(*sort_key).limit(limit + 1))
+        return [((row[1], row[2], row[3]), row[0]) for row in result.all()]
+
+class PrefixIndexSearch:
+    """In-process fallback for databases without pg_trgm: a sorted list of word prefixes.
+
+    Indexes the username, email and each word of the full name, so it matches
+    from the start of a word only (no RANK_CONTAINS results). The index is
+    rebuilt from the users table when invalidated or USER_SEARCH_INDEX_TTL_SECONDS old.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._keys: List[Tuple[str, str]] = []
+        self._users: Dict[str, Tuple[str, str, str]] = {}
+        self._built_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        self._built_at = None
+
+    def _fresh(self) -> bool:
+        return self._built_at is not None and time.monotonic() - self._built_at < self.ttl
+
+    async def _ensure_built(self, db: AsyncSession):
+        if self._fresh():
+            return
+        async with self._lock:
+            if self._fresh():
+                return
+            User = schemas.User
+            rows = (await db.execute(select(User.id, User.username, User.full_name, User.email))).all()
+            keys = set()
+            for user_id, username, full_name, email in rows:
+                for token in (username, email, full_name, *full_name.split()):
+                    keys.add((token.lower(), user_id))
+            self._keys = sorted(keys)
+            self._users = {user_id: (username, full_name, email) for user_id, username, full_name, email in rows}
+            self._built_at = time.monotonic()
+
+    def _candidates(self, query: str) -> Set[str]:
+        found = set()
+        position = bisect.bisect_left(self._keys, (query, ""))
+        while position < len(self._keys) and self._keys[position][0].startswith(query):
+            found.add(self._keys[position][1])
+            position += 1
+        return found
+
+    async def search(self, db: AsyncSession, query: str, limit: int, after: Optional[list], team_id: Optional[str], exclude_id: Optional[str]) -> List[Tuple[tuple, schemas.User]]:
+        await self._ensure_built(db)
+        candidates = self._candidates(query)
+        candidates.discard(exclude_id)
+        if team_id is not None and candidates:
+            members = await db.execute(_team_member_ids(team_id).filter(schemas.team_member_association.c.user_id.in_(candidates)))
+            candidates &= set(members.scalars())
+        keys = []
+        for user_id in candidates:
+            rank = _rank(query, *self._users[user_id])
+            if rank is not None:
+                keys.append((rank, self._users[user_id][0].lower(), user_id))
+        keys.sort()
+        if after is not None:
+            keys = keys[bisect.bisect_right(keys, tuple(after)):]
+        keys = keys[:limit + 1]
+        if not keys:
+            return []
+        users = {user.id: user for user in (await db.execute(select(schemas.User).filter(schemas.User.id.in_([key[2] for key in keys])))).scalars()}
+        # A user deleted since the index was built simply drops out
+        return [(key, users[key[2]]) for key in keys if key[2] in users]
+
+class UserSearch:
+    """Ranked, limited user lookups for the member pickers, with a short-lived cache for repeated keystrokes."""
+
+    def __init__(self, backend, cache_ttl: int):
+        self.backend = backend
+        self.cache_ttl = cache_ttl
+        self._cache = InMemoryCacheBackend(settings.USER_SEARCH_CACHE_MAX_SIZE)
+
+    def invalidate(self):
+        """Call after a user is created or renamed."""
+        if isinstance(self.backend, PrefixIndexSearch):
+            self.backend.invalidate()
+
+    async def search(self, db: AsyncSession, query: str, limit: int, cursor: Optional[str] = None, scope: str = "all", team_id: Optional[str] = None, exclude_id: Optional[str] = None) -> schemas.UserSearchResponse:
+        query = query.strip().lower()[:MAX_QUERY_LENGTH]
+        if not query:
+            return schemas.UserSearchResponse(users=[])
+
+        cache_key = f"{scope}:{exclude_id}:{limit}:{cursor}:{query}"
+        if self.cache_ttl > 0:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return schemas.UserSearchResponse.model_validate_json(cached)
+
+        after = decode_cursor(cursor) if cursor else None
+        if after is not None and (len(after) != 3 or not isinstance(after[0], int)):
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+        rows = await self.backend.search(db, query, limit, after, team_id, exclude_id)
+        next_cursor = encode_cursor(list(rows[limit - 1][0])) if len(rows) > limit else None
+        response = schemas.UserSearchResponse(users=[user for _, user in rows[:limit]], next_cursor=next_cursor)
+        if self.cache_ttl > 0:
+            self._cache.set(cache_key, response.model_dump_json(), self.cache_ttl)
+        return response
+
+def _create_backend():
+    backend = settings.USER_SEARCH_BACKEND
+    if backend == "auto":
+        backend = "trigram" if make_url(settings.DATABASE_URL).get_backend_name() == "postgresql" else "prefix"
+    if backend == "prefix":
+        return PrefixIndexSearch(settings.USER_SEARCH_INDEX_TTL_SECONDS)
+    return TrigramSearch()
+
+user_search = UserSearch(_create_backend(), settings.USER_SEARCH_CACHE_TTL_SECONDS)
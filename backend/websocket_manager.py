@@ -1,33 +1,253 @@
-from fastapi import WebSocket, WebSocketDisconnect
-from typing import Dict, List
+from fastapi import WebSocket, WebSocketDisconnect, status
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional, Set
+import asyncio
 import logging
+import time
+import uuid
+
+from config import settings
+from services.metrics import Histogram
+from services.pubsub import InMemoryPubSub, create_pubsub
+
+PING_MESSAGE = '{"type": "ping"}'
+
+TASK_EVENTS = ("task_created", "task_updated", "task_deleted")
+
+def project_channel(project_id: str, event_type: str, user_id: str = "*") -> str:
+    """Channel for a project's task events: "*" is the owner's full feed, a user id that user's assigned tasks."""
+    return f"{project_id}:{event_type}:{user_id}"
+
+class ReplayBuffer:
+    """The most recent messages on one project's channels, numbered in the order this worker delivered them.
+
+    The epoch changes whenever a buffer is created (restart, another worker, LRU
+    eviction), so a client holding a sequence number from a different buffer is
+    told to resync rather than handed a wrong replay.
+    """
+
+    def __init__(self, size: int):
+        self.epoch = uuid.uuid4().hex[:12]
+        self.seq = 0
+        self._entries = deque(maxlen=size)
+
+    def append(self, channel: str, message: str) -> str:
+        self.seq += 1
+        # Messages are JSON objects serialized once upstream; splice the number in rather than re-encode
+        message = f'{message[:-1]}, "seq": {self.seq}}}'
+        self._entries.append((self.seq, channel, message))
+        return message
+
+    def since(self, seq: int, channels: Iterable[str]) -> Optional[List[str]]:
+        """Messages after seq on the given channels, or None when some of them have already been dropped."""
+        oldest = self._entries[0][0] if self._entries else self.seq + 1
+        if seq > self.seq or seq < oldest - 1:
+            return None
+        channels = set(channels)
+        return [message for number, channel, message in self._entries if number > seq and channel in channels]
 
 class ConnectionManager:
-    def __init__(self):
+    """Sockets held by this worker; broadcasts go through the pub/sub backend so every worker delivers them.
+
+    A socket can be subscribed to any number of channels. Everything sent to it,
+    broadcasts and direct replies alike, goes through its own outbound queue so
+    only the sender task ever writes to the socket. Once started, a heartbeat task
+    pings every socket and reaps the ones that have gone quiet.
+    """
+
+    def __init__(self, namespace: str, pubsub: InMemoryPubSub, send_timeout: float = settings.WS_SEND_TIMEOUT, queue_size: int = settings.WS_OUTBOUND_QUEUE_SIZE, replay_size: int = 0):
         self.active_connections: Dict[str, List[WebSocket]] = {}
+        self.namespace = namespace
+        self.pubsub = pubsub
+        pubsub.subscribe(namespace, self.deliver)
+        self.send_timeout = send_timeout
+        self.queue_size = queue_size
+        self.evictions = 0
+        self.reaped = 0
+        self.publish_latency = Histogram()
+        self.delivery_latency = Histogram()
+        self._outbound: Dict[WebSocket, asyncio.Queue] = {}
+        self._senders: Dict[WebSocket, asyncio.Task] = {}
+        self._channels: Dict[WebSocket, Set[str]] = {}
+        self._last_seen: Dict[WebSocket, float] = {}
+        self._heartbeat: Optional[asyncio.Task] = None
+        # Closes started from sync code (reap, _evict); the event loop only keeps weak references to tasks
+        self._closing: Set[asyncio.Task] = set()
+        self.replay_size = replay_size
+        self._replay: "OrderedDict[str, ReplayBuffer]" = OrderedDict()
+
+    async def start(self):
+        if self._heartbeat is None:
+            self._heartbeat = asyncio.create_task(self._heartbeat_loop())
 
-    async def connect(self, websocket: WebSocket, project_id: str):
+    async def stop(self):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            await asyncio.gather(self._heartbeat, return_exceptions=True)
+            self._heartbeat = None
+
+    async def connect(self, websocket: WebSocket, channel: str = None):
         await websocket.accept()
-        if project_id not in self.active_connections:
-            self.active_connections[project_id] = []
-        self.active_connections[project_id].append(websocket)
-        logging.info(f"Client connected to project {project_id}. Total connections for project: {len(self.active_connections[project_id])}")
-
-    def disconnect(self, websocket: WebSocket, project_id: str):
-        if project_id in self.active_connections:
-            self.active_connections[project_id].remove(websocket)
-            logging.info(f"Client disconnected from project {project_id}. Total connections for project: {len(self.active_connections.get(project_id, []))}")
-
-    async def broadcast(self, message: str, project_id: str):
-        logging.info(f"Broadcasting to project {project_id}. Connections: {len(self.active_connections.get(project_id, []))}")
-        if project_id in self.active_connections:
-            for i, connection in enumerate(self.active_connections[project_id]):
-                try:
-                    logging.info(f"Sending to connection {i} for project {project_id}...")
-                    await connection.send_text(message)
-                    logging.info(f"Successfully sent to connection {i} for project {project_id}.")
-                except Exception as e:
-                    logging.error(f"Failed to send to connection {i} for project {project_id}: {e}")
-        logging.info(f"Finished broadcasting to project {project_id}.")
-
-manager = ConnectionManager()
+        self._outbound[websocket] = asyncio.Queue(maxsize=self.queue_size)
+        self._channels[websocket] = set()
+        self._last_seen[websocket] = time.monotonic()
+        self._senders[websocket] = asyncio.create_task(self._send_loop(websocket))
+        if channel is not None:
+            self.subscribe(websocket, channel)
+        logging.info(f"Client connected to {self.namespace} channels. Total connections: {len(self._outbound)}")
+
+    def touch(self, websocket: WebSocket):
+        """Record that the client is alive; call on every inbound message."""
+        if websocket in self._last_seen:
+            self._last_seen[websocket] = time.monotonic()
+
+    def subscribe(self, websocket: WebSocket, channel: str):
+        channels = self._channels.get(websocket)
+        if channels is None or channel in channels:
+            return
+        channels.add(channel)
+        self.active_connections.setdefault(channel, []).append(websocket)
+
+    def unsubscribe(self, websocket: WebSocket, channel: str):
+        channels = self._channels.get(websocket)
+        if channels is None or channel not in channels:
+            return
+        channels.discard(channel)
+        connections = self.active_connections[channel]
+        connections.remove(websocket)
+        if not connections:
+            del self.active_connections[channel]
+
+    def subscriptions(self, websocket: WebSocket) -> Set[str]:
+        return set(self._channels.get(websocket, ()))
+
+    def disconnect(self, websocket: WebSocket):
+        if websocket not in self._channels:
+            return
+        for channel in self.subscriptions(websocket):
+            self.unsubscribe(websocket, channel)
+        del self._channels[websocket]
+        self._last_seen.pop(websocket, None)
+        self._outbound.pop(websocket, None)
+        sender = self._senders.pop(websocket, None)
+        if sender is not None and sender is not asyncio.current_task():
+            sender.cancel()
+        logging.info(f"Client disconnected from {self.namespace} channels. Total connections: {len(self._outbound)}")
+
+    def send(self, websocket: WebSocket, message: str):
+        """Queue a message for one socket, e.g. a reply to something it sent."""
+        queue = self._outbound.get(websocket)
+        if queue is None:
+            return
+        try:
+            queue.put_nowait((message, time.monotonic()))
+        except asyncio.QueueFull:
+            self._evict(websocket, "outbound queue full")
+
+    async def broadcast(self, message: str, channel: str):
+        start = time.monotonic()
+        try:
+            await self.pubsub.publish(self.namespace, channel, message)
+            self.publish_latency.observe(time.monotonic() - start)
+        except Exception as e:
+            # Reach at least this worker's sockets when the broker is unavailable
+            logging.error(f"Failed to publish to {self.namespace} {channel}, delivering locally: {e}")
+            await self.deliver(channel, message)
+
+    def replay_buffer(self, key: str) -> ReplayBuffer:
+        """Replay buffer for a channel key (the project id), created on first use."""
+        buffer = self._replay.get(key)
+        if buffer is None:
+            buffer = self._replay[key] = ReplayBuffer(self.replay_size)
+            if len(self._replay) > settings.WS_REPLAY_MAX_PROJECTS:
+                self._replay.popitem(last=False)
+        else:
+            self._replay.move_to_end(key)
+        return buffer
+
+    async def deliver(self, channel: str, message: str):
+        """Queue the message for every local connection on the channel without waiting for any send."""
+        if self.replay_size:
+            # Recorded even with no local subscribers, so a client reconnecting here can catch up
+            message = self.replay_buffer(channel.split(":", 1)[0]).append(channel, message)
+        connections = list(self.active_connections.get(channel, []))
+        if settings.WS_DEBUG_LOGGING:
+            logging.info(f"Broadcasting to {self.namespace} {channel}. Connections: {len(connections)}")
+        for websocket in connections:
+            self.send(websocket, message)
+
+    async def _send_loop(self, websocket: WebSocket):
+        queue = self._outbound[websocket]
+        while True:
+            message, enqueued_at = await queue.get()
+            try:
+                await asyncio.wait_for(websocket.send_text(message), timeout=self.send_timeout)
+            except asyncio.TimeoutError:
+                self._evict(websocket, f"send took longer than {self.send_timeout}s")
+                return
+            except Exception as e:
+                self._evict(websocket, f"send failed: {e}")
+                return
+            self.delivery_latency.observe(time.monotonic() - enqueued_at)
+            if settings.WS_DEBUG_LOGGING:
+                logging.info(f"Sent to a {self.namespace} connection, {queue.qsize()} messages still queued.")
+
+    def reap(self, idle_timeout: float = None) -> int:
+        """Close sockets that have not sent anything for idle_timeout seconds, e.g. half-open ones."""
+        cutoff = time.monotonic() - (settings.WS_IDLE_TIMEOUT if idle_timeout is None else idle_timeout)
+        idle = [websocket for websocket, seen in self._last_seen.items() if seen < cutoff]
+        for websocket in idle:
+            self.reaped += 1
+            self.disconnect(websocket)
+            self._close_later(websocket, status.WS_1001_GOING_AWAY)
+        if idle:
+            logging.info(f"Reaped {len(idle)} idle {self.namespace} WebSocket connections.")
+        return len(idle)
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(settings.WS_HEARTBEAT_INTERVAL)
+            try:
+                self.reap()
+                for websocket in list(self._outbound):
+                    self.send(websocket, PING_MESSAGE)
+            except Exception as e:
+                logging.error(f"{self.namespace} WebSocket heartbeat failed: {e}")
+
+    def stats(self) -> dict:
+        # Channels are "<project id>:<event>:<audience>" for projects and "<user id>" for notifications;
+        # count distinct sockets per leading key
+        per_key: Dict[str, Set[WebSocket]] = {}
+        for channel, connections in self.active_connections.items():
+            per_key.setdefault(channel.split(":", 1)[0], set()).update(connections)
+        return {
+            "connections": len(self._outbound),
+            "channels": len(self.active_connections),
+            "connections_per_key": {key: len(connections) for key, connections in per_key.items()},
+            "evictions": self.evictions,
+            "reaped": self.reaped,
+            "publish_latency_seconds": self.publish_latency.snapshot(),
+            "delivery_latency_seconds": self.delivery_latency.snapshot(),
+        }
+
+    def _evict(self, websocket: WebSocket, reason: str):
+        self.evictions += 1
+        logging.warning(f"Dropping slow {self.namespace} WebSocket client: {reason}.")
+        self.disconnect(websocket)
+        self._close_later(websocket, status.WS_1013_TRY_AGAIN_LATER)
+
+    def _close_later(self, websocket: WebSocket, code: int):
+        task = asyncio.create_task(self.close(websocket, code))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def close(self, websocket: WebSocket, code: int = status.WS_1000_NORMAL_CLOSURE):
+        try:
+            await asyncio.wait_for(websocket.close(code=code), timeout=self.send_timeout)
+        except Exception:
+            pass
+
+pubsub = create_pubsub()
+manager = ConnectionManager("project", pubsub, replay_size=settings.WS_REPLAY_BUFFER_SIZE)
+# Per-user notification channels, keyed by user id instead of project id
+notification_manager = ConnectionManager("user", pubsub)
@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { authAPI, teamAPI } from '../utils/api';
 import CircularSpinner from './CircularSpinner';
 import { X } from 'lucide-react';
@@ -9,28 +9,41 @@ const AddMemberModal = ({ isOpen, onClose, team, onMemberAdded }) => {
   const [selectedMembers, setSelectedMembers] = useState([]);
   const [loading, setLoading] = useState(false);
   const [searchLoading, setSearchLoading] = useState(false);
+  const searchTimer = useRef(null);
+  const latestQuery = useRef('');
 
-  const searchUsers = async (query) => {
-    if (query.length < 2) {
-      setSearchResults([]);
-      return;
-    }
-    
+  useEffect(() => () => clearTimeout(searchTimer.current), []);
+
+  const runSearch = async (query) => {
     setSearchLoading(true);
     try {
       const response = await authAPI.searchUsers(query);
+      // A slower response for an earlier keystroke must not overwrite newer results
+      if (query !== latestQuery.current) return;
       // Filter out users already in the team or selected
       const existingMemberIds = team.members?.map(m => m.id) || [];
       const selectedMemberIds = selectedMembers.map(m => m.id);
-      const filteredResults = response.filter(user => 
+      const filteredResults = response.users.filter(user => 
         !existingMemberIds.includes(user.id) && !selectedMemberIds.includes(user.id)
       );
       setSearchResults(filteredResults);
     } catch (error) {
       console.error('Error searching users:', error);
     } finally {
+      if (query === latestQuery.current) setSearchLoading(false);
+    }
+  };
+
+  // Wait for a pause in typing instead of searching on every keystroke
+  const searchUsers = (query) => {
+    latestQuery.current = query;
+    clearTimeout(searchTimer.current);
+    if (query.length < 2) {
+      setSearchResults([]);
       setSearchLoading(false);
+      return;
     }
+    searchTimer.current = setTimeout(() => runSearch(query), 250);
   };
 
   const handleSelectMember = (user) => {
@@ -79,7 +92,7 @@ const AddMemberModal = ({ isOpen, onClose, team, onMemberAdded }) => {
         <div className="relative">
           <input
             type="text"
-            placeholder="Search users by username..."
+            placeholder="Search users by name, username or email..."
             className="input-glass w-full focus-glass"
             value={searchQuery}
             onChange={(e) => {
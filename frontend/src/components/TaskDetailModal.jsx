@@ -29,7 +29,7 @@ const TaskDetailModal = ({ isOpen, onClose, task, onEdit, onDeleteTask, user, pr
     if (lastMessage) {
       const { type, data } = lastMessage;
       if (type === 'task_updated' && data.id === currentTask?.id) {
-        setCurrentTask(data);
+        setCurrentTask(prevTask => ({ ...prevTask, ...data }));
       }
     }
   }, [lastMessage, currentTask?.id]);
@@ -1,5 +1,6 @@
 import { useState, useEffect } from 'react';
-import { notificationAPI } from '../utils/api';
+import ReconnectingWebSocket from 'reconnecting-websocket';
+import { notificationAPI, getWebSocketUrl } from '../utils/api';
 
 export const useNotifications = () => {
   const [notifications, setNotifications] = useState([]);
@@ -8,14 +9,27 @@ export const useNotifications = () => {
 
   useEffect(() => {
     loadNotifications();
-    loadUnreadCount();
-    
-    // Poll for new notifications every 30 seconds
-    const interval = setInterval(() => {
-      loadUnreadCount();
-    }, 30000);
-    
-    return () => clearInterval(interval);
+
+    // The server pushes the unread count on connect, then new notifications and read events
+    const ws = new ReconnectingWebSocket(() => getWebSocketUrl('/ws/notifications'));
+    ws.onmessage = (event) => {
+      const message = JSON.parse(event.data);
+      if (message.type === 'ping') {
+        ws.send(JSON.stringify({ action: 'pong' }));
+      } else if (message.type === 'unread_count') {
+        setUnreadCount(message.data.count);
+      } else if (message.type === 'notification_created') {
+        setNotifications((current) => [message.data, ...current]);
+        setUnreadCount((count) => count + 1);
+      } else if (message.type === 'notifications_read') {
+        setNotifications((current) => current.map((notification) =>
+          !message.data.id || notification.id === message.data.id ? { ...notification, is_read: true } : notification
+        ));
+        setUnreadCount((count) => Math.max(0, count + message.data.unread_delta));
+      }
+    };
+
+    return () => ws.close();
   }, []);
 
   const loadNotifications = async () => {
@@ -30,20 +44,9 @@ export const useNotifications = () => {
     }
   };
 
-  const loadUnreadCount = async () => {
-    try {
-      const response = await notificationAPI.getUnreadCount();
-      setUnreadCount(response?.count || 0);
-    } catch (error) {
-      console.error('Error loading unread count:', error);
-    }
-  };
-
   const markAsRead = async (notificationId) => {
     try {
       await notificationAPI.markRead(notificationId);
-      await loadNotifications();
-      await loadUnreadCount();
     } catch (error) {
       console.error('Error marking notification as read:', error);
     }
@@ -52,8 +55,6 @@ export const useNotifications = () => {
   const markAllAsRead = async () => {
     try {
       await notificationAPI.markAllRead();
-      await loadNotifications();
-      await loadUnreadCount();
     } catch (error) {
       console.error('Error marking all notifications as read:', error);
     }
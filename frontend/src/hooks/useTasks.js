@@ -23,7 +23,8 @@ export const useTasks = (projectId = null) => {
           console.log('WebSocket: Received task_updated', data);
           setTasks(prevTasks => {
             console.log('WebSocket: Old task state:', prevTasks.find(t => t.id === data.id));
-            return prevTasks.map(task => task.id === data.id ? data : task)
+            // Merge so delta updates (only the changed fields) and full tasks are handled alike
+            return prevTasks.map(task => task.id === data.id ? { ...task, ...data } : task)
           });
         } else if (type === 'task_created') {
             const isForCurrentProject = projectId && data.project_id === projectId;
@@ -115,6 +116,13 @@ export const useTasks = (projectId = null) => {
     loadTasks(1, true);
   }, [cacheKey, loadTasks]);
 
+  // The server could not replay what this socket missed while disconnected
+  useEffect(() => {
+    if (lastMessage?.type === 'resync_required') {
+      refresh();
+    }
+  }, [lastMessage, refresh]);
+
   const loadMore = () => {
     if (!loading && hasMore) {
       loadTasks(page);
@@ -1,5 +1,6 @@
 import { useState, useEffect, useRef } from 'react';
 import ReconnectingWebSocket from 'reconnecting-websocket';
+import { getWebSocketUrl } from '../utils/api';
 
 const useWebSocket = (projectId) => {
   const [lastMessage, setLastMessage] = useState(null);
@@ -10,15 +11,36 @@ const useWebSocket = (projectId) => {
       return;
     }
 
-    const url = `ws://localhost:8000/api/ws/${projectId}`;
-    ws.current = new ReconnectingWebSocket(url);
+    const socket = new ReconnectingWebSocket(() => getWebSocketUrl('/ws'));
+    ws.current = socket;
+    // Position in the server's replay buffer, sent back on reconnect to receive only missed events
+    const replay = { epoch: null, seq: 0 };
 
+    // Subscriptions live on the connection, so (re)subscribe every time it opens
     ws.current.onopen = () => {
       console.log('WebSocket connected');
+      const resume = replay.epoch ? { since: replay.seq, epoch: replay.epoch } : {};
+      socket.send(JSON.stringify({ action: 'subscribe', project_id: projectId, ...resume }));
     };
 
     ws.current.onmessage = (event) => {
       const message = JSON.parse(event.data);
+      // Answer heartbeats or the server closes the socket as idle
+      if (message.type === 'ping') {
+        socket.send(JSON.stringify({ action: 'pong' }));
+        return;
+      }
+      if (message.type === 'subscribed') {
+        // A new epoch means a different buffer; if events were missed the server follows up with resync_required
+        if (message.data.epoch !== replay.epoch) {
+          replay.epoch = message.data.epoch;
+          replay.seq = message.data.seq;
+        }
+        return;
+      }
+      if (message.seq) {
+        replay.seq = message.seq;
+      }
       setLastMessage(message);
     };
 
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { teamAPI, authAPI, projectAPI } from '../utils/api';
 
@@ -300,22 +300,35 @@ const TeamModal = ({ isOpen, onClose, onTeamCreated }) => {
   const [searchResults, setSearchResults] = useState([]);
   const [loading, setLoading] = useState(false);
   const [searchLoading, setSearchLoading] = useState(false);
+  const searchTimer = useRef(null);
+  const latestQuery = useRef('');
 
-  const searchUsers = async (query) => {
-    if (query.length < 2) {
-      setSearchResults([]);
-      return;
-    }
-    
+  useEffect(() => () => clearTimeout(searchTimer.current), []);
+
+  const runSearch = async (query) => {
     setSearchLoading(true);
     try {
       const response = await authAPI.searchUsers(query);
-      setSearchResults(response);
+      // A slower response for an earlier keystroke must not overwrite newer results
+      if (query !== latestQuery.current) return;
+      setSearchResults(response.users);
     } catch (error) {
       console.error('Error searching users:', error);
     } finally {
+      if (query === latestQuery.current) setSearchLoading(false);
+    }
+  };
+
+  // Wait for a pause in typing instead of searching on every keystroke
+  const searchUsers = (query) => {
+    latestQuery.current = query;
+    clearTimeout(searchTimer.current);
+    if (query.length < 2) {
+      setSearchResults([]);
       setSearchLoading(false);
+      return;
     }
+    searchTimer.current = setTimeout(() => runSearch(query), 250);
   };
 
   const addMember = (user) => {
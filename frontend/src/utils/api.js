@@ -6,6 +6,11 @@ export const setGlobalErrorHandler = (handler) => {
   globalErrorHandler = handler;
 };
 
+// WebSocket URL for a backend path. The token is read on every call so a
+// reconnecting socket picks up a refreshed one.
+export const getWebSocketUrl = (path) =>
+  `${process.env.REACT_APP_BACKEND_URL.replace(/^http/, 'ws')}/api${path}?token=${localStorage.getItem('token')}`;
+
 // Create an axios instance
 const api = axios.create({
   baseURL: process.env.REACT_APP_BACKEND_URL + '/api',
@@ -74,7 +79,7 @@ export const authAPI = {
   login: (credentials) => api.post('/auth/login', credentials),
   register: (userData) => api.post('/auth/register', userData),
   getMe: (userId) => api.get(userId ? `/auth/users/${userId}` : '/auth/me'),
-  searchUsers: (query) => api.get(`/auth/users/search?query=${encodeURIComponent(query)}`),
+  searchUsers: (query, limit = 10) => api.get(`/auth/users/search?query=${encodeURIComponent(query)}&limit=${limit}`),
   updateMe: (userData) => api.put('/users/me', userData),
 };
 
@@ -92,7 +97,7 @@ export const teamAPI = {
   delete: (id) => api.delete(`/teams/${id}`),
   getMembers: (id, page = 1, per_page = 20) => api.get(`/teams/${id}/members?page=${page}&per_page=${per_page}`),
   addMember: (id, data) => api.post(`/teams/${id}/members`, data),
-  searchMembers: (id, query) => api.get(`/teams/${id}/members/search?query=${encodeURIComponent(query)}`),
+  searchMembers: (id, query, limit = 10) => api.get(`/teams/${id}/members/search?query=${encodeURIComponent(query)}&limit=${limit}`),
   getProjectsForTeam: (teamId) => api.get(`/teams/${teamId}/projects`),
 };
 